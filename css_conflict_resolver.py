@@ -10,29 +10,224 @@ Auteur: Assistant IA
 Version: 1.0
 """
 
+import io
 import os
 import re
-import uuid
+import html
+import itertools
+import fnmatch
 import json
+import hashlib
 import shutil
+import tempfile
+import gzip
+import mmap
+import sys
+import time
+import heapq
+import bisect
+import random
+from array import array
+from contextlib import contextmanager, suppress
 from pathlib import Path
-from bs4 import BeautifulSoup, Comment
-import tinycss2
+from urllib.parse import quote, unquote
+from collections import Counter, OrderedDict, deque
 from dataclasses import dataclass, asdict
-from typing import Dict, Set, List, Tuple, Optional
+from typing import Dict, Set, List, Tuple, Optional, Union
 import argparse
 import logging
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('css_conflict_resolution.log'),
-        logging.StreamHandler()
-    ]
-)
+# API publique : l'import n'écrit rien et ne charge ni bs4 ni tinycss2
+__all__ = [
+    'ConflictResolver', 'ResolutionMetrics', 'WatchSession', 'ResolverServer', 'RPCError',
+    'SelectorExtractor', 'FileCollector', 'ProjectFiles', 'FileReplacer', 'CSSRewriteEngine',
+    'CSSParser', 'HTMLParser', 'JavaScriptParser', 'HTMLDocument', 'StreamingHTMLDocument',
+    'SelectorTable', 'SelectorMapping', 'SelectorIndex', 'UUIDGenerator', 'SourceMap',
+    'ExtractionCache', 'MemoryExtractionCache', 'OutputManifest',
+    'SyntheticProjectGenerator', 'run_benchmark', 'conflict_report_sarif', 'configure_logging', 'main',
+]
+
+# Le module n'écrit rien à l'import : la configuration des logs (console et
+# fichier) est faite par configure_logging, appelée par la ligne de commande
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+LOG_FILE = 'css_conflict_resolution.log'
+
+def configure_logging(log_file: Optional[str] = LOG_FILE, level: int = logging.INFO):
+    """Configure les logs de la ligne de commande (stderr et fichier)"""
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file))
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+# Version des parsers : à incrémenter dès que l'extraction change de résultat
+# afin d'invalider le cache d'extraction
+PARSER_VERSION = '1.3'
+
+# Types de fichiers traités, par extension
+FILE_TYPES = {'.css': 'css', '.html': 'html', '.js': 'js'}
+
+# Backends HTML disponibles : parsers BeautifulSoup ou tokenizer en flux
+HTML_BACKENDS = ('html.parser', 'lxml', 'stream')
+
+# Nombre de threads d'entrées/sorties par défaut (lectures, copies, écritures)
+IO_THREADS = 4
+
+# Taille à partir de laquelle un fichier CSS est traité en flux, et taille des
+# blocs lus dans ce mode
+CSS_STREAM_THRESHOLD = 32 * 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+def decode_source(raw: bytes, keep_newlines: bool = False) -> str:
+    """Décode un contenu UTF-8 avec la normalisation des fins de ligne de read_text"""
+    content = raw.decode('utf-8')
+    if keep_newlines:
+        return content
+    return content.replace('\r\n', '\n').replace('\r', '\n')
+
+def read_source_text(file_path: Path) -> str:
+    """Lit un fichier UTF-8 en conservant ses fins de ligne"""
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+def write_source_text(file_path: Path, content: str):
+    """Écrit un fichier UTF-8 sans traduire ses fins de ligne"""
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(content)
+
+def restore_newlines(content: str, source_path: Path) -> str:
+    """Rétablit les fins de ligne CRLF de la source dans un contenu re-sérialisé"""
+    with open(source_path, 'rb') as f:
+        if b'\r\n' not in f.read(STREAM_CHUNK_SIZE):
+            return content
+    return re.sub(r'\r?\n', '\r\n', content)
+
+def read_html_file(html_file: Path) -> str:
+    """Lit un fichier HTML en conservant ses fins de ligne"""
+    return read_source_text(html_file)
+
+def write_html_file(html_file: Path, content: str):
+    """Écrit un fichier HTML sans traduire ses fins de ligne"""
+    write_source_text(html_file, content)
+
+@contextmanager
+def mapped_file(file_path: Path):
+    """Projette un fichier en mémoire en lecture seule (b'' s'il est vide)"""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+# Une édition (début, fin, remplacement) remplace content[début:fin] ; les
+# éditions d'un contenu sont triées et disjointes
+
+def iter_spliced(content, edits):
+    """Morceaux du contenu édité : tranches inchangées et remplacements"""
+    position = 0
+    for start, end, replacement in edits:
+        yield content[position:start]
+        yield replacement
+        position = end
+    yield content[position:]
+
+def apply_edits(content, edits):
+    """Applique des éditions ; hors des spans édités, le contenu est conservé"""
+    return content[:0].join(iter_spliced(content, edits))
+
+def encode_edits(content: str, edits) -> List[Tuple[int, int, bytes]]:
+    """Convertit des éditions en indices de caractères en offsets d'octets UTF-8"""
+    byte_edits = []
+    position = 0
+    byte_position = 0
+    for start, end, replacement in edits:
+        byte_start = byte_position + len(content[position:start].encode('utf-8'))
+        byte_end = byte_start + len(content[start:end].encode('utf-8'))
+        byte_edits.append((byte_start, byte_end, replacement.encode('utf-8')))
+        position, byte_position = end, byte_end
+    return byte_edits
+
+# État propre à chaque processus de travail (initialisé une fois par worker)
+_worker_state: Dict = {}
+
+def run_parallel(worker, tasks: List, jobs: int, initializer=None, initargs: Tuple = ()):
+    """Exécute worker sur chaque tâche dans un pool de processus
+
+    Les résultats sont retournés dans l'ordre des tâches afin que les logs et
+    la fusion des résultats restent déterministes.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+        yield from executor.map(worker, tasks, chunksize=chunksize)
+
+def run_threaded(function, tasks: List, threads: int, window: Optional[int] = None):
+    """Exécute function sur chaque tâche dans un pool de threads
+
+    Pour les étapes dominées par les entrées/sorties : lectures, analyses et
+    écritures de fichiers différents se recouvrent. Au plus window tâches
+    (défaut : 2 × threads) sont en cours, ce qui borne la mémoire des
+    contenus lus d'avance ; les résultats sont retournés dans l'ordre des
+    tâches.
+    """
+    if threads <= 1 or len(tasks) <= 1:
+        yield from map(function, tasks)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    window = window or threads * 2
+    remaining = iter(tasks)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = deque(executor.submit(function, task) for task in itertools.islice(remaining, window))
+        while pending:
+            result = pending.popleft().result()
+            for task in itertools.islice(remaining, 1):
+                pending.append(executor.submit(function, task))
+            yield result
+
+def _init_extract_worker(html_backend: str, cache: Optional['ExtractionCache'] = None,
+                         css_stream_threshold: int = CSS_STREAM_THRESHOLD,
+                         locator: Optional['SelectorLocator'] = None, scan_names: bool = False):
+    _worker_state['extractor'] = SelectorExtractor(html_backend, cache, css_stream_threshold)
+    _worker_state['locator'] = locator
+    _worker_state['scan_names'] = scan_names
+
+def _extract_file_worker(task: Tuple[str, Path]) -> Tuple[Optional[Set[str]], Optional[Dict], Optional[Set[str]],
+                                                          Optional[str], float]:
+    return _worker_state['extractor']._extract_task(task, False, _worker_state['locator'],
+                                                    _worker_state['scan_names'])
+
+def _init_locate_worker(selectors: Set[str]):
+    _worker_state['locator'] = SelectorLocator(selectors)
+
+def _locate_file_worker(task: Tuple[str, Path]) -> Tuple[Optional[Dict[str, List[int]]], Optional[str]]:
+    file_type, file_path = task
+    try:
+        with mapped_file(file_path) as raw:
+            return _worker_state['locator'].locate(raw, file_type), None
+    except Exception as e:
+        return None, str(e)
+
+def _init_rewrite_worker(mapping: Dict, html_backend: str, css_stream_threshold: int = CSS_STREAM_THRESHOLD,
+                         splice: bool = False, link_assets: bool = True):
+    _worker_state['replacer'] = FileReplacer(mapping, html_backend, css_stream_threshold, splice, link_assets)
+
+def _rewrite_file_worker(task: Tuple[str, Path, Path, Optional[List[int]]]) -> Tuple[Optional[List], Optional[str], float]:
+    file_type, source_path, destination_path, offsets = task
+    start = time.perf_counter()
+    try:
+        edits = _worker_state['replacer'].rewrite_file(source_path, destination_path, file_type, offsets=offsets)
+        return edits, None, time.perf_counter() - start
+    except Exception as e:
+        return False, str(e), time.perf_counter() - start
 
 @dataclass
 class ProjectFiles:
@@ -41,21 +236,96 @@ class ProjectFiles:
     css_files: List[Path]
     js_files: List[Path]
 
+    def tasks(self) -> List[Tuple[str, Path]]:
+        """Liste ordonnée (type, chemin) : CSS, puis HTML, puis JS"""
+        return (
+            [('css', path) for path in self.css_files] +
+            [('html', path) for path in self.html_files] +
+            [('js', path) for path in self.js_files]
+        )
+
 @dataclass
 class SelectorMapping:
     """Mappage d'un sélecteur vers son nouveau nom UUID"""
+    __slots__ = ('original', 'uuid_name', 'selector_type')
     original: str
     uuid_name: str
     selector_type: str  # 'class', 'id', 'element'
 
+class SelectorTable:
+    """Table compacte des sélecteurs, identifiés par des entiers
+
+    Le type (classe, ID ou élément) et le nom sans préfixe, interné, de
+    chaque sélecteur sont rangés dans deux tableaux parallèles. Les
+    ensembles de sélecteurs d'un projet sont des ensembles d'identifiants :
+    intersections et comptages se font sur des entiers.
+    """
+
+    CLASS, ID, ELEMENT = 0, 1, 2
+    PREFIXES = ('.', '#', '')
+    KIND_OF_PREFIX = {'.': CLASS, '#': ID}
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.names: List[str] = []
+        # Par type : nom -> identifiant
+        self._ids: Tuple[Dict[str, int], ...] = ({}, {}, {})
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, kind: int, name: str) -> int:
+        """Identifiant du sélecteur (type, nom), ajouté au besoin"""
+        ids = self._ids[kind]
+        selector_id = ids.get(name)
+        if selector_id is None:
+            selector_id = ids[name] = len(self.names)
+            self.names.append(sys.intern(name))
+            self.kinds.append(kind)
+        return selector_id
+
+    @classmethod
+    def split(cls, selector: str) -> Tuple[int, str]:
+        """Décompose un sélecteur préfixé en (type, nom)"""
+        kind = cls.KIND_OF_PREFIX.get(selector[:1], cls.ELEMENT)
+        return kind, selector if kind == cls.ELEMENT else selector[1:]
+
+    def add_selectors(self, selectors) -> Set[int]:
+        """Identifiants d'un ensemble de sélecteurs préfixés"""
+        add, split = self.add, self.split
+        return {add(*split(selector)) for selector in selectors}
+
+    def find(self, selector: str) -> Optional[int]:
+        kind, name = self.split(selector)
+        return self._ids[kind].get(name)
+
+    def selector(self, selector_id: int) -> str:
+        return self.PREFIXES[self.kinds[selector_id]] + self.names[selector_id]
+
+    def selectors(self, selector_ids) -> Set[str]:
+        return {self.selector(selector_id) for selector_id in selector_ids}
+
 class CSSParser:
     """Parser CSS utilisant tinycss2"""
 
+    # Nom de classe ou d'ID retenu (préfixe ASCII du nom du token)
+    NAME_PATTERN = re.compile(r'[a-zA-Z][a-zA-Z0-9_-]*')
+
+    # Début d'un élément à traiter lors du découpage en flux
+    STREAM_SPECIAL = re.compile(r'/\*|["\'\\{};]')
+    # Élément complet : commentaire, chaîne ou caractère échappé
+    STREAM_TOKEN = re.compile(r'/\*.*?\*/|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|\\.', re.S)
+    # Mêmes expressions pour un contenu brut (bytes ou mmap)
+    STREAM_SPECIAL_BYTES = re.compile(STREAM_SPECIAL.pattern.encode('ascii'))
+    STREAM_TOKEN_BYTES = re.compile(STREAM_TOKEN.pattern.encode('ascii'), re.S)
+
     def __init__(self):
         self.selectors = set()
 
     def extract_selectors_from_css(self, css_content: str) -> Set[str]:
         """Extrait tous les sélecteurs CSS d'un contenu CSS"""
+        import tinycss2
+
         selectors = set()
 
         try:
@@ -64,19 +334,7 @@ class CSSParser:
 
             for rule in stylesheet:
                 if rule.type == 'qualified-rule':
-                    # Extraire les sélecteurs de la règle
-                    selector_text = ''.join([token.serialize() for token in rule.prelude]).strip()
-
-                    # Diviser par les virgules pour les sélecteurs multiples
-                    for selector in selector_text.split(','):
-                        selector = selector.strip()
-                        if selector:
-                            # Extraire les classes et IDs individuels
-                            class_matches = re.findall(r'\.[a-zA-Z][a-zA-Z0-9_-]*', selector)
-                            id_matches = re.findall(r'#[a-zA-Z][a-zA-Z0-9_-]*', selector)
-
-                            selectors.update(class_matches)
-                            selectors.update(id_matches)
+                    selectors.update(self.selectors_from_tokens(rule.prelude))
 
         except Exception as e:
             logger.warning(f"Erreur lors du parsing CSS: {e}")
@@ -85,6 +343,129 @@ class CSSParser:
 
         return selectors
 
+    def extract_selectors_from_stream(self, source, chunk_size: int = STREAM_CHUNK_SIZE) -> Set[str]:
+        """Extrait les sélecteurs d'une feuille de style lue par blocs ou brute
+
+        Seul le prélude de la règle en cours est gardé en mémoire : les blocs
+        de déclarations sont parcourus sans être conservés.
+        """
+        import tinycss2
+
+        selectors = set()
+        for prelude in self.iter_rule_preludes(source, chunk_size):
+            selectors.update(self.selectors_from_tokens(tinycss2.parse_component_value_list(prelude)))
+        return selectors
+
+    @classmethod
+    def selectors_from_tokens(cls, tokens) -> Set[str]:
+        """Classes et IDs d'un prélude, lus directement dans les tokens"""
+        selectors = set()
+        previous = None
+        for token in tokens:
+            if token.type == 'hash':
+                match = cls.NAME_PATTERN.match(token.value)
+                if match:
+                    selectors.add('#' + match.group())
+            elif token.type == 'ident' and previous is not None and previous == '.':
+                match = cls.NAME_PATTERN.match(token.value)
+                if match:
+                    selectors.add('.' + match.group())
+            elif token.type == 'function':
+                selectors.update(cls.selectors_from_tokens(token.arguments))
+            elif token.type in ('() block', '[] block'):
+                selectors.update(cls.selectors_from_tokens(token.content))
+            previous = token
+        return selectors
+
+    @classmethod
+    def iter_rule_preludes(cls, source, chunk_size: int = STREAM_CHUNK_SIZE):
+        """Préludes (texte avant '{') des règles de premier niveau
+
+        source est un fichier texte ouvert, lu par blocs, ou un contenu
+        complet (str, bytes ou mmap) parcouru sans copie : seuls les préludes
+        en sont extraits et décodés. Mêmes règles que
+        tinycss2.parse_stylesheet : les at-rules sont ignorées, les
+        commentaires retirés, les chaînes et caractères échappés ne comptent
+        pas comme délimiteurs.
+        """
+        if isinstance(source, (str, bytes, bytearray, mmap.mmap)):
+            buffer = source
+            read = lambda: ''
+        else:
+            buffer = source.read(chunk_size)
+            read = lambda: source.read(chunk_size)
+
+        if isinstance(buffer, str):
+            special, token_pattern, empty = cls.STREAM_SPECIAL, cls.STREAM_TOKEN, ''
+        else:
+            special, token_pattern, empty = cls.STREAM_SPECIAL_BYTES, cls.STREAM_TOKEN_BYTES, b''
+
+        def prelude_text(pieces):
+            text = empty.join(pieces).strip()
+            return text.decode('utf-8') if isinstance(text, bytes) else text
+
+        position = 0
+        depth = 0
+        prelude = []
+        eof = not buffer
+
+        while buffer:
+            match = special.search(buffer, position)
+            if match is None:
+                # Un '/' final peut ouvrir un commentaire coupé entre deux blocs
+                carry = buffer[-1:] if buffer[-1:] in ('/', b'/') and position < len(buffer) else empty
+                if depth == 0:
+                    prelude.append(buffer[position:len(buffer) - len(carry)])
+                chunk = read()
+                if not chunk:
+                    prelude.append(carry)
+                    break
+                buffer = carry + chunk
+                position = 0
+                continue
+
+            start = match.start()
+            if depth == 0:
+                prelude.append(buffer[position:start])
+            char = match.group()
+            kind = char if isinstance(char, str) else char.decode('ascii')
+
+            if kind in '{};':
+                position = match.end()
+                if kind == '{':
+                    if depth == 0:
+                        text = prelude_text(prelude)
+                        if text and not text.startswith('@'):
+                            yield text
+                        prelude = []
+                    depth += 1
+                elif kind == '}':
+                    if depth > 0:
+                        depth -= 1
+                    prelude = []
+                elif depth == 0:
+                    if prelude_text(prelude).startswith('@'):
+                        # Fin d'une at-rule sans bloc (@import, @charset...)
+                        prelude = []
+                    else:
+                        prelude.append(char)
+                continue
+
+            # Commentaire, chaîne ou échappement : il doit être complet dans le tampon
+            token = token_pattern.match(buffer, start)
+            while token is None and not eof:
+                chunk = read()
+                if not chunk:
+                    eof = True
+                    break
+                buffer = buffer[start:] + chunk
+                start = 0
+                token = token_pattern.match(buffer)
+            end = token.end() if token is not None else len(buffer)
+            if depth == 0 and kind != '/*':
+                prelude.append(buffer[start:end])
+            position = end
+
     def _extract_with_regex(self, css_content: str) -> Set[str]:
         """Extraction de secours avec regex"""
         selectors = set()
@@ -99,196 +480,1179 @@ class CSSParser:
 
         return selectors
 
-    def extract_from_style_tags(self, html_content: str) -> Set[str]:
+    def extract_from_style_tags(self, html_content: Union[str, 'HTMLDocument']) -> Set[str]:
         """Extrait les sélecteurs des balises <style> dans HTML"""
         selectors = set()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = HTMLDocument.ensure(html_content)
 
-        for style_tag in soup.find_all('style'):
-            if style_tag.string:
-                selectors.update(self.extract_selectors_from_css(style_tag.string))
+        for style_content in document.style_contents():
+            selectors.update(self.extract_selectors_from_css(style_content))
 
         return selectors
 
-    def extract_inline_selectors(self, html_content: str) -> Set[str]:
+    def extract_inline_selectors(self, html_content: Union[str, 'HTMLDocument']) -> Set[str]:
         """Extrait les sélecteurs des attributs style inline"""
         selectors = set()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = HTMLDocument.ensure(html_content)
 
-        # Chercher tous les éléments avec attribut style
-        for element in soup.find_all(style=True):
-            style_attr = element.get('style', '')
+        for style_attr in document.inline_styles():
             # Pour les styles inline, on peut extraire des références à des classes
             class_refs = re.findall(r'\.[a-zA-Z][a-zA-Z0-9_-]*', style_attr)
             selectors.update(class_refs)
 
         return selectors
 
+class HTMLDocument:
+    """Document HTML analysé une seule fois
+
+    Un unique parcours de l'arbre relève les éléments portant des attributs
+    class, id et style ainsi que les balises <style>. Le même document est
+    réutilisé par l'extraction puis par la phase de remplacement.
+    """
+
+    def __init__(self, html_content: str, backend: str = 'html.parser'):
+        from bs4 import BeautifulSoup
+
+        self.soup = BeautifulSoup(html_content, backend)
+        self.class_elements = []
+        self.id_elements = []
+        self.style_tags = []
+        self.inline_style_elements = []
+
+        for element in self.soup.find_all(True):
+            if element.has_attr('class'):
+                self.class_elements.append(element)
+            if element.has_attr('id'):
+                self.id_elements.append(element)
+            if element.has_attr('style'):
+                self.inline_style_elements.append(element)
+            if element.name == 'style':
+                self.style_tags.append(element)
+
+    @staticmethod
+    def ensure(html_content: Union[str, 'HTMLDocument', 'StreamingHTMLDocument'],
+               backend: str = 'html.parser') -> Union['HTMLDocument', 'StreamingHTMLDocument']:
+        """Retourne le document tel quel ou l'analyse avec le backend choisi"""
+        if isinstance(html_content, (HTMLDocument, StreamingHTMLDocument)):
+            return html_content
+        if backend == 'stream':
+            return StreamingHTMLDocument(html_content)
+        return HTMLDocument(html_content, backend)
+
+    def classes(self) -> List[str]:
+        """Retourne toutes les classes des attributs class"""
+        all_classes = []
+        for element in self.class_elements:
+            classes = element.get('class', [])
+            if isinstance(classes, str):
+                classes = classes.split()
+            all_classes.extend(classes)
+        return all_classes
+
+    def ids(self) -> List[str]:
+        """Retourne tous les IDs non vides"""
+        return [element.get('id') for element in self.id_elements if element.get('id')]
+
+    def style_contents(self) -> List[str]:
+        """Retourne le contenu des balises <style>"""
+        return [style_tag.string for style_tag in self.style_tags if style_tag.string]
+
+    def inline_styles(self) -> List[str]:
+        """Retourne les valeurs des attributs style"""
+        return [element.get('style', '') for element in self.inline_style_elements]
+
+class StreamingHTMLDocument:
+    """Document HTML tokenisé en flux, sans construction d'arbre
+
+    Seules les balises ouvrantes sont analysées pour relever les attributs
+    class, id et style, ainsi que le contenu des balises <style>. La
+    réécriture remplace uniquement ces valeurs et conserve tout le reste du
+    balisage octet pour octet.
+    """
+
+    TOKEN_PATTERN = re.compile(
+        r'<!--.*?-->'
+        r'|<!\[CDATA\[.*?\]\]>'
+        r'|<[!?][^>]*>'
+        r'|</[^>]*>'
+        r'|<([a-zA-Z][^\s/>]*)((?:"[^"]*"|\'[^\']*\'|[^\'">])*)>',
+        re.DOTALL
+    )
+    ATTRIBUTE_PATTERN = re.compile(
+        r'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+)))?'
+    )
+    RAW_TEXT_TAGS = ('script', 'style')
+    # Nom de classe dans une valeur d'attribut class
+    CLASS_TOKEN = re.compile(r'\S+')
+
+    def __init__(self, html_content: str):
+        self.content = html_content
+        # Spans (début, fin) des valeurs d'attributs et des contenus <style>
+        self.class_spans: List[Tuple[int, int]] = []
+        self.id_spans: List[Tuple[int, int]] = []
+        self.inline_style_spans: List[Tuple[int, int]] = []
+        self.style_spans: List[Tuple[int, int]] = []
+        self._tokenize()
+
+    def _tokenize(self):
+        """Parcourt le document une seule fois et relève les spans utiles"""
+        content = self.content
+        position = 0
+
+        while True:
+            match = self.TOKEN_PATTERN.search(content, position)
+            if match is None:
+                break
+            position = match.end()
+
+            tag_name = match.group(1)
+            if tag_name is None:
+                continue
+
+            attrs_start = match.start(2)
+            for attr in self.ATTRIBUTE_PATTERN.finditer(match.group(2)):
+                name = attr.group(1).lower()
+                for group in (2, 3, 4):
+                    if attr.group(group) is not None:
+                        span = (attrs_start + attr.start(group), attrs_start + attr.end(group))
+                        break
+                else:
+                    span = None
+
+                if span is None:
+                    continue
+                if name == 'class':
+                    self.class_spans.append(span)
+                elif name == 'id':
+                    self.id_spans.append(span)
+                elif name == 'style':
+                    self.inline_style_spans.append(span)
+
+            # Le contenu de <script> et <style> n'est pas du balisage
+            tag_name = tag_name.lower()
+            if tag_name in self.RAW_TEXT_TAGS and not match.group(2).rstrip().endswith('/'):
+                closing = re.compile(r'</' + tag_name + r'\s*>', re.IGNORECASE).search(content, position)
+                end = closing.start() if closing else len(content)
+                if tag_name == 'style' and end > position:
+                    self.style_spans.append((position, end))
+                position = closing.end() if closing else len(content)
+
+    def _values(self, spans: List[Tuple[int, int]]) -> List[str]:
+        return [html.unescape(self.content[start:end]) for start, end in spans]
+
+    def classes(self) -> List[str]:
+        """Retourne toutes les classes des attributs class"""
+        all_classes = []
+        for value in self._values(self.class_spans):
+            all_classes.extend(value.split())
+        return all_classes
+
+    def ids(self) -> List[str]:
+        """Retourne tous les IDs non vides"""
+        return [value for value in self._values(self.id_spans) if value]
+
+    def style_contents(self) -> List[str]:
+        """Retourne le contenu des balises <style>"""
+        return [self.content[start:end] for start, end in self.style_spans]
+
+    def inline_styles(self) -> List[str]:
+        """Retourne les valeurs des attributs style"""
+        return self._values(self.inline_style_spans)
+
+    def edits(self, rename_class, rename_id, css_edits) -> List[Tuple[int, int, str]]:
+        """Éditions du document, limitées aux noms renommés
+
+        rename_class et rename_id reçoivent un nom et retournent le nouveau nom
+        ou None ; css_edits reçoit un contenu CSS et son offset dans le
+        document et retourne ses éditions.
+        """
+        content = self.content
+        edits = []
+
+        for start, end in self.class_spans:
+            for token in self.CLASS_TOKEN.finditer(content, start, end):
+                new_name = rename_class(html.unescape(token.group(0)))
+                if new_name is not None:
+                    edits.append((token.start(), token.end(), new_name))
+
+        for start, end in self.id_spans:
+            new_id = rename_id(html.unescape(content[start:end]))
+            if new_id is not None:
+                edits.append((start, end, new_id))
+
+        for start, end in self.inline_style_spans + self.style_spans:
+            edits.extend(css_edits(content[start:end], start))
+
+        edits.sort()
+        return edits
+
+    def rewrite(self, rename_class, rename_id, css_edits) -> str:
+        """Réécrit les valeurs relevées et conserve le reste du document"""
+        return apply_edits(self.content, self.edits(rename_class, rename_id, css_edits))
+
 class HTMLParser:
     """Parser HTML utilisant BeautifulSoup"""
 
-    def extract_classes_and_ids(self, html_content: str) -> Set[str]:
+    def extract_classes_and_ids(self, html_content: Union[str, HTMLDocument]) -> Set[str]:
         """Extrait toutes les classes et IDs utilisés dans le HTML"""
         selectors = set()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = HTMLDocument.ensure(html_content)
 
-        # Extraire toutes les classes
-        for element in soup.find_all(class_=True):
-            classes = element.get('class', [])
-            if isinstance(classes, str):
-                classes = classes.split()
-            for cls in classes:
-                selectors.add(f'.{cls}')
-
-        # Extraire tous les IDs
-        for element in soup.find_all(id=True):
-            element_id = element.get('id')
-            if element_id:
-                selectors.add(f'#{element_id}')
+        # Noms dédoublonnés avant l'ajout du préfixe
+        selectors.update('.' + cls for cls in set(document.classes()))
+        selectors.update('#' + element_id for element_id in set(document.ids()))
 
         return selectors
 
 class JavaScriptParser:
-    """Parser JavaScript pour détecter les références CSS"""
+    """Parser JavaScript pour détecter les références CSS
+
+    Toutes les API prises en charge (querySelector*, getElementBy*, jQuery,
+    classList.*, className) sont reconnues par une seule expression
+    régulière combinée, en un seul parcours du fichier.
+    """
+
+    # API reconnues, suivies de leur argument chaîne
+    API_PATTERN = (
+        r'(?P<api>querySelectorAll|querySelector|getElementById|getElementsByClassName'
+        r'|jQuery|\$|classList\s*\.\s*(?:add|remove|toggle|contains))\s*\(\s*'
+        r'|(?P<assign>className)\s*=\s*'
+    )
+    # Littéral chaîne simple (sans échappement ni retour à la ligne)
+    STRING_PATTERN = r'(?P<quote>["\'`])(?P<value>[^"\'`\\\r\n]*)(?P=quote)'
+
+    # Extraction : argument d'une API reconnue. Le lookahead sur le premier
+    # caractère permet au moteur d'écarter rapidement les autres positions ;
+    # les noms d'API JavaScript sont sensibles à la casse.
+    EXTRACT_PATTERN = re.compile(
+        r'(?=[qgjc$])(?:' + API_PATTERN + r')' + STRING_PATTERN + r'(?(api)\s*[,)])'
+    )
+    # Réécriture : argument d'une API reconnue, ou tout littéral chaîne
+    REWRITE_PATTERN = re.compile(
+        r'(?=[qgjc$"\'`])(?:' + API_PATTERN + r')?' + STRING_PATTERN
+    )
+    # Extraction sur un contenu brut (bytes ou mmap), sans décodage du fichier
+    EXTRACT_BYTES_PATTERN = re.compile(EXTRACT_PATTERN.pattern.encode('ascii'))
+
+    SELECTOR_TOKEN_PATTERN = re.compile(r'[.#][a-zA-Z][a-zA-Z0-9_-]*')
+    NAME_PATTERN = re.compile(r'-?[_a-zA-Z][_a-zA-Z0-9-]*')
+
+    # Nombre de passes de l'ancienne implémentation (une regex par API)
+    LEGACY_PATTERNS = [
+        r'querySelector\s*\(\s*["\'](.*?)["\']\s*\)',
+        r'querySelectorAll\s*\(\s*["\'](.*?)["\']\s*\)',
+        r'getElementById\s*\(\s*["\'](.*?)["\']\s*\)',
+        r'getElementsByClassName\s*\(\s*["\'](.*?)["\']\s*\)',
+        r'\$\s*\(\s*["\'](.*?)["\']\s*\)',
+        r'className\s*=\s*["\'](.*?)["\']\s*',
+        r'classList\.add\s*\(\s*["\'](.*?)["\']\s*\)',
+        r'classList\.remove\s*\(\s*["\'](.*?)["\']\s*\)',
+        r'classList\.toggle\s*\(\s*["\'](.*?)["\']\s*\)',
+    ]
 
-    def __init__(self):
-        self.js_patterns = [
-            # querySelector et querySelectorAll
-            r'querySelector\s*\(\s*["\'](.*?)["\']\\s*\)',
-            r'querySelectorAll\s*\(\s*["\'](.*?)["\']\\s*\)',
-
-            # getElementById et getElementsByClassName
-            r'getElementById\s*\(\s*["\'](.*?)["\']\\s*\)',
-            r'getElementsByClassName\s*\(\s*["\'](.*?)["\']\\s*\)',
-
-            # jQuery selectors
-            r'\$\s*\(\s*["\'](.*?)["\']\\s*\)',
-
-            # className assignments
-            r'className\s*=\s*["\'](.*?)["\']\\s*',
-            r'classList\.add\s*\(\s*["\'](.*?)["\']\\s*\)',
-            r'classList\.remove\s*\(\s*["\'](.*?)["\']\\s*\)',
-            r'classList\.toggle\s*\(\s*["\'](.*?)["\']\\s*\)',
-        ]
+    @staticmethod
+    def api_kind(match) -> Optional[str]:
+        """Type d'argument attendu : 'selector', 'id', 'class' ou None (simple chaîne)"""
+        if match.group('assign'):
+            return 'class'
+        api = match.group('api')
+        if not api:
+            return None
+        if isinstance(api, bytes):
+            api = api.decode('ascii')
+        if api.startswith('querySelector') or api in ('$', 'jQuery'):
+            return 'selector'
+        if api == 'getElementById':
+            return 'id'
+        return 'class'
+
+    def selectors_from_value(self, kind: str, value: str) -> Set[str]:
+        """Sélecteurs référencés par l'argument d'une API"""
+        if kind == 'selector':
+            return set(self.SELECTOR_TOKEN_PATTERN.findall(value))
+        if kind == 'id':
+            value = value.strip()
+            return {f'#{value}'} if self.NAME_PATTERN.fullmatch(value) else set()
+        return {f'.{name}' for name in value.split() if self.NAME_PATTERN.fullmatch(name)}
 
     def extract_css_references(self, js_content: str) -> Set[str]:
         """Extrait les références CSS du JavaScript"""
         selectors = set()
 
-        for pattern in self.js_patterns:
-            matches = re.finditer(pattern, js_content, re.IGNORECASE | re.MULTILINE)
-            for match in matches:
+        for match in self.EXTRACT_PATTERN.finditer(js_content):
+            selectors.update(self.selectors_from_value(self.api_kind(match), match.group('value')))
+
+        return selectors
+
+    def extract_css_references_bytes(self, raw) -> Set[str]:
+        """Extrait les références CSS d'un contenu brut ; seuls les arguments sont décodés"""
+        selectors = set()
+
+        for match in self.EXTRACT_BYTES_PATTERN.finditer(raw):
+            value = match.group('value').decode('utf-8')
+            selectors.update(self.selectors_from_value(self.api_kind(match), value))
+
+        return selectors
+
+    def extract_css_references_multipass(self, js_content: str) -> Set[str]:
+        """Implémentation de référence : une passe finditer par API"""
+        selectors = set()
+
+        for pattern in self.LEGACY_PATTERNS:
+            for match in re.finditer(pattern, js_content, re.IGNORECASE | re.MULTILINE):
                 selector = match.group(1).strip()
-                if selector:
-                    # Normaliser les sélecteurs
-                    if selector.startswith('.') or selector.startswith('#'):
-                        selectors.add(selector)
-                    elif ' ' not in selector and selector.isidentifier():
-                        # Probablement une classe ou un ID
-                        selectors.add(f'.{selector}')
+                if selector.startswith(('.', '#')):
+                    selectors.add(selector)
+                elif selector and ' ' not in selector and selector.isidentifier():
+                    selectors.add(f'.{selector}')
 
         return selectors
 
-class FileCollector:
-    """Collecteur de fichiers pour un projet"""
+    @classmethod
+    def benchmark(cls, js_content: str, mapping: Optional[Dict[str, SelectorMapping]] = None,
+                  repeat: int = 3) -> Dict:
+        """Mesure l'extraction (combinée et multi-passes) et la réécriture JS"""
+        parser = cls()
+        timings = {}
+        for name, function in (('single_pass', parser.extract_css_references),
+                               ('multipass', parser.extract_css_references_multipass)):
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                function(js_content)
+                durations.append(time.perf_counter() - start)
+            timings[name] = min(durations)
+
+        if mapping is None:
+            mapping = UUIDGenerator.generate_uuid_mapping(parser.extract_css_references(js_content))
+        replacer = FileReplacer(mapping)
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            replacer.replace_in_js(js_content)
+            durations.append(time.perf_counter() - start)
 
-    @staticmethod
-    def collect_project_files(directory: Path) -> ProjectFiles:
+        return {
+            'js_bytes': len(js_content.encode('utf-8')),
+            'selectors': len(mapping),
+            'extract_single_pass_seconds': timings['single_pass'],
+            'extract_multipass_seconds': timings['multipass'],
+            'extract_speedup': (timings['multipass'] / timings['single_pass']
+                                if timings['single_pass'] else float('inf')),
+            'rewrite_seconds': min(durations)
+        }
+
+class FileCollector:
+    """Collecteur de fichiers pour un projet
+
+    Un seul parcours os.scandir, trié, relève les fichiers de tous les types.
+    Les répertoires dont le nom correspond à une règle d'exclusion (motifs
+    fnmatch, par défaut node_modules, .git...) ne sont pas analysés.
+    """
+
+    IGNORED_DIRECTORIES = ('node_modules', '.git', '.hg', '.svn', '__pycache__')
+
+    def __init__(self, ignored: Optional[List[str]] = None):
+        self.ignored = tuple(self.IGNORED_DIRECTORIES if ignored is None else ignored)
+
+    def is_ignored(self, name: str) -> bool:
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.ignored)
+
+    def walk(self, directory: Path, exclude: Optional[Path] = None, include_ignored: bool = False):
+        """Parcourt directory en profondeur, répertoires et fichiers triés par nom
+
+        Produit (répertoire, fichiers, ignoré) pour chaque répertoire, où
+        fichiers est la liste des os.DirEntry des fichiers. Les répertoires
+        exclus ne sont parcourus qu'avec include_ignored (ignoré vaut alors
+        True pour eux et leurs sous-répertoires). exclude (par exemple le
+        répertoire de sortie) n'est jamais parcouru. Les liens symboliques
+        vers des répertoires sont suivis, comme le faisait copytree ; un lien
+        vers un répertoire parent (boucle) n'est pas parcouru.
+        """
+        excluded = exclude.resolve() if exclude is not None else None
+        stack = [(Path(directory), False, frozenset())]
+        while stack:
+            current, ignored, ancestors = stack.pop()
+            if excluded is not None and current.resolve() == excluded:
+                continue
+            try:
+                stat = current.stat()
+                key = (stat.st_dev, stat.st_ino)
+                if key in ancestors:
+                    logger.warning(f"Boucle de liens symboliques ignorée: {current}")
+                    continue
+                ancestors = ancestors | {key}
+                with os.scandir(current) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError as e:
+                logger.warning(f"Impossible de parcourir {current}: {e}")
+                continue
+
+            files = []
+            subdirectories = []
+            for entry in entries:
+                if entry.is_dir():
+                    entry_ignored = ignored or self.is_ignored(entry.name)
+                    if include_ignored or not entry_ignored:
+                        subdirectories.append((current / entry.name, entry_ignored, ancestors))
+                elif entry.is_file():
+                    files.append(entry)
+
+            yield current, files, ignored
+            stack.extend(reversed(subdirectories))
+
+    def collect_project_files(self, directory: Path, exclude: Optional[Path] = None) -> ProjectFiles:
         """Collecte tous les fichiers HTML, CSS et JS d'un répertoire"""
         if not directory.exists():
             raise FileNotFoundError(f"Le répertoire {directory} n'existe pas")
 
-        html_files = list(directory.rglob('*.html'))
-        css_files = list(directory.rglob('*.css'))
-        js_files = list(directory.rglob('*.js'))
+        collected: Dict[str, List[Path]] = {'html': [], 'css': [], 'js': []}
+        for current, files, _ in self.walk(directory, exclude):
+            for entry in files:
+                file_type = FILE_TYPES.get(os.path.splitext(entry.name)[1])
+                if file_type is not None:
+                    collected[file_type].append(current / entry.name)
 
+        html_files, css_files, js_files = collected['html'], collected['css'], collected['js']
         logger.info(f"Trouvé {len(html_files)} fichiers HTML, {len(css_files)} CSS, {len(js_files)} JS dans {directory}")
 
         return ProjectFiles(html_files, css_files, js_files)
 
-class SelectorExtractor:
-    """Extracteur principal de sélecteurs"""
+class ExtractionCache:
+    """Cache disque des sélecteurs extraits, indexé par empreinte de contenu
 
-    def __init__(self):
-        self.css_parser = CSSParser()
-        self.html_parser = HTMLParser()
-        self.js_parser = JavaScriptParser()
+    La clé combine le SHA-256 du contenu, le type de fichier, le backend HTML
+    et PARSER_VERSION. Chaque entrée est un petit fichier JSON ; la taille
+    totale est bornée par une éviction des entrées les moins récemment
+    utilisées (date de modification, rafraîchie à chaque lecture).
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(raw: bytes, file_type: str, html_backend: str) -> str:
+        """Clé de cache d'un contenu"""
+        digest = hashlib.sha256()
+        digest.update(f'{PARSER_VERSION}\0{file_type}\0{html_backend}\0'.encode('utf-8'))
+        digest.update(raw)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key_file(file_path: Path, file_type: str, html_backend: str) -> str:
+        """Clé de cache d'un fichier, lu par blocs (identique à key)"""
+        digest = hashlib.sha256()
+        digest.update(f'{PARSER_VERSION}\0{file_type}\0{html_backend}\0'.encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, key: str) -> Optional[Set[str]]:
+        """Retourne les sélecteurs en cache, ou None"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                selectors = set(json.load(f))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return selectors
 
-    def extract_all_selectors(self, project_files: ProjectFiles) -> Set[str]:
-        """Extrait tous les sélecteurs d'un projet"""
-        all_selectors = set()
+    def put(self, key: str, selectors: Set[str]):
+        """Enregistre les sélecteurs d'un contenu (écriture atomique)"""
+        entry_path = self._entry_path(key)
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            # Nom temporaire unique : plusieurs threads peuvent écrire la même clé
+            fd, tmp_name = tempfile.mkstemp(suffix='.tmp', dir=entry_path.parent)
+            try:
+                with open(fd, 'w', encoding='utf-8') as f:
+                    json.dump(sorted(selectors), f, ensure_ascii=False)
+                os.replace(tmp_name, entry_path)
+            except BaseException:
+                with suppress(OSError):
+                    os.unlink(tmp_name)
+                raise
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire dans le cache {entry_path}: {e}")
+
+    def prune(self) -> int:
+        """Évince les entrées les plus anciennes au-delà de max_bytes"""
+        if not self.cache_dir.exists():
+            return 0
 
-        # CSS files
-        for css_file in project_files.css_files:
+        entries = []
+        total_size = 0
+        for entry_path in self.cache_dir.glob('*/*.json'):
             try:
-                content = css_file.read_text(encoding='utf-8')
-                selectors = self.css_parser.extract_selectors_from_css(content)
-                all_selectors.update(selectors)
-                logger.debug(f"Extrait {len(selectors)} sélecteurs de {css_file}")
-            except Exception as e:
-                logger.error(f"Erreur lors de la lecture de {css_file}: {e}")
-
-        # HTML files
-        for html_file in project_files.html_files:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total_size += stat.st_size
+
+        evicted = 0
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total_size <= self.max_bytes:
+                break
             try:
-                content = html_file.read_text(encoding='utf-8')
-                # Classes et IDs dans les attributs
-                selectors_from_attrs = self.html_parser.extract_classes_and_ids(content)
-                all_selectors.update(selectors_from_attrs)
+                entry_path.unlink()
+            except OSError:
+                continue
+            total_size -= size
+            evicted += 1
+
+        if evicted:
+            logger.debug(f"Cache d'extraction : {evicted} entrées évincées")
+        return evicted
+
+class MemoryExtractionCache:
+    """Cache d'extraction en mémoire (mode serveur), borné en nombre d'entrées
+
+    Mêmes clés et même interface que ExtractionCache ; les entrées les moins
+    récemment utilisées sont évincées. Les processus de travail (jobs > 1)
+    en reçoivent une copie vide : seul le processus principal le remplit.
+    """
+
+    key = staticmethod(ExtractionCache.key)
+    key_file = staticmethod(ExtractionCache.key_file)
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[str, frozenset]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['entries'] = OrderedDict()
+        return state
+
+    def get(self, key: str) -> Optional[Set[str]]:
+        """Retourne les sélecteurs en cache, ou None"""
+        selectors = self.entries.get(key)
+        if selectors is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return set(selectors)
+
+    def put(self, key: str, selectors: Set[str]):
+        """Enregistre les sélecteurs d'un contenu"""
+        self.entries[key] = frozenset(selectors)
+        self.entries.move_to_end(key)
+
+    def prune(self) -> int:
+        """Évince les entrées les plus anciennes au-delà de max_entries"""
+        evicted = 0
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+class SelectorLocator:
+    """Repère les occurrences de sélecteurs là où la réécriture peut les modifier
+
+    Une occurrence dépend du type de fichier : nom préfixé par . ou # dans un
+    CSS, dans le CSS d'un document HTML (balises <style>, attributs style) et
+    dans l'argument d'une API JS qui attend un sélecteur ; nom d'un attribut
+    class ou id, ou d'un argument d'API de classes ou d'id ; chaîne JS égale à
+    un sélecteur préfixé. Un nom de balise ou un texte n'en est jamais une.
+    Les offsets (octets) désignent le début du nom, sans son préfixe.
+    """
+
+    # Nom préfixé, jusqu'au premier caractère qui ne peut pas le prolonger
+    PREFIXED_NAME = re.compile(rb'[.#]((?:[\w-]|[\x80-\xff])+)')
+    PREFIXED_NAME_TEXT = re.compile(r'[.#]((?:[\w-]|[^\x00-\x7f])+)')
+    CLASS_TOKEN = re.compile(rb'\S+')
+    JS_PATTERN = re.compile(JavaScriptParser.REWRITE_PATTERN.pattern.encode('ascii'))
+
+    def __init__(self, selectors: Optional[Set[str]] = None):
+        # None : toutes les occurrences de tous les sélecteurs
+        self.selectors = selectors
+        self.selectors_by_bytes = None
+        if selectors is not None:
+            self.selectors_by_bytes = {selector.encode('utf-8'): selector for selector in selectors}
+
+    def locate(self, raw, file_type: str,
+               document: Optional[StreamingHTMLDocument] = None) -> Dict[str, List[int]]:
+        """Retourne, pour chaque sélecteur présent, les offsets (octets) de son nom
+
+        Pour un fichier HTML, document (tokenisé à partir du même contenu)
+        évite une nouvelle analyse.
+        """
+        occurrences: Dict[str, List[int]] = {}
+        if file_type == 'html':
+            selectors = self.selectors
+            for selector, offset in self._html_occurrences(raw, document):
+                if selectors is None or selector in selectors:
+                    occurrences.setdefault(selector, []).append(offset)
+            return occurrences
+
+        found = self._js_occurrences(raw) if file_type == 'js' else self._prefixed(raw, 0, len(raw))
+        by_bytes = self.selectors_by_bytes
+        for name, offset in found:
+            if by_bytes is None:
+                selector = name.decode('utf-8', 'replace')
+            else:
+                selector = by_bytes.get(name)
+                if selector is None:
+                    continue
+            occurrences.setdefault(selector, []).append(offset)
+        return occurrences
+
+    @classmethod
+    def prefixed_names(cls, raw) -> Set[str]:
+        """Noms (sans préfixe) de tous les noms préfixés d'un contenu brut,
+        y compris dans les blocs @media ou les commentaires"""
+        return {name.decode('utf-8', 'replace') for name in set(cls.PREFIXED_NAME.findall(raw))}
+
+    def _prefixed(self, raw, start: int, end: int):
+        for match in self.PREFIXED_NAME.finditer(raw, start, end):
+            yield match.group(0), match.start(1)
+
+    def _js_occurrences(self, raw):
+        """Occurrences dans les chaînes JS, selon l'API qui les reçoit"""
+        for match in self.JS_PATTERN.finditer(raw):
+            value = match.group('value')
+            value_start, value_end = match.span('value')
+            kind = JavaScriptParser.api_kind(match)
+            if kind == 'selector':
+                yield from self._prefixed(raw, value_start, value_end)
+            elif kind == 'class':
+                for token in self.CLASS_TOKEN.finditer(raw, value_start, value_end):
+                    yield b'.' + token.group(0), token.start()
+            elif kind == 'id':
+                name = value.strip()
+                if name:
+                    yield b'#' + name, value_start + value.index(name)
+            elif value[:1] in (b'.', b'#'):
+                yield value, value_start + 1
+
+    def _html_occurrences(self, raw, document: Optional[StreamingHTMLDocument]):
+        """Occurrences dans les attributs class, id et style et les balises <style>"""
+        if document is None:
+            document = StreamingHTMLDocument(raw[:].decode('utf-8'))
+        content = document.content
+
+        found = []
+        for start, end in document.class_spans:
+            for token in StreamingHTMLDocument.CLASS_TOKEN.finditer(content, start, end):
+                found.append((token.start(), '.' + html.unescape(token.group(0))))
+        for start, end in document.id_spans:
+            value = html.unescape(content[start:end])
+            if value:
+                found.append((start, '#' + value))
+        for start, end in document.inline_style_spans + document.style_spans:
+            for match in self.PREFIXED_NAME_TEXT.finditer(content, start, end):
+                found.append((match.start(1), match.group(0)))
+
+        if len(content) == len(raw):
+            # Contenu ASCII : indices de caractères et offsets d'octets coïncident
+            return [(selector, position) for position, selector in found]
+
+        found.sort()
+        occurrences = []
+        position = byte_position = 0
+        for char_position, selector in found:
+            byte_position += len(content[position:char_position].encode('utf-8'))
+            position = char_position
+            occurrences.append((selector, byte_position))
+        return occurrences
+
+class SelectorIndex:
+    """Index inversé : sélecteur -> fichiers -> offsets des occurrences
+
+    Relevé pendant l'extraction, sur le contenu lu pour celle-ci, il permet
+    à la réécriture d'ignorer les fichiers sans sélecteur en conflit et de ne
+    corriger que les spans relevés. Une occurrence est une position que la
+    réécriture peut modifier (voir SelectorLocator). Sérialisé en JSON
+    compressé, avec des offsets codés en deltas.
+    """
+
+    FORMAT_VERSION = 1
 
-                # Sélecteurs dans les balises <style>
-                selectors_from_style = self.css_parser.extract_from_style_tags(content)
-                all_selectors.update(selectors_from_style)
+    def __init__(self):
+        self.files: List[str] = []
+        self.file_types: List[str] = []
+        self.file_ids: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self.file_selectors: Dict[int, Set[str]] = {}
+
+    def add_file(self, file_path: Path, file_type: str, occurrences: Dict[str, List[int]]):
+        """Enregistre les occurrences d'un fichier (remplace les précédentes)"""
+        key = str(file_path)
+        file_id = self.file_ids.get(key)
+        if file_id is None:
+            file_id = len(self.files)
+            self.files.append(key)
+            self.file_types.append(file_type)
+            self.file_ids[key] = file_id
+        else:
+            for selector in self.file_selectors.get(file_id, ()):
+                self.postings[selector].pop(file_id, None)
+
+        for selector, offsets in occurrences.items():
+            self.postings.setdefault(selector, {})[file_id] = sorted(offsets)
+        self.file_selectors[file_id] = set(occurrences)
+
+    def __contains__(self, file_path: Path) -> bool:
+        return str(file_path) in self.file_ids
+
+    def selectors_in(self, file_path: Path) -> Set[str]:
+        """Sélecteurs présents dans un fichier indexé"""
+        file_id = self.file_ids.get(str(file_path))
+        return self.file_selectors.get(file_id, set()) if file_id is not None else set()
+
+    def offsets_in(self, file_path: Path, selectors) -> List[int]:
+        """Offsets triés des occurrences des sélecteurs donnés dans un fichier"""
+        file_id = self.file_ids[str(file_path)]
+        offsets = set()
+        for selector in selectors:
+            offsets.update(self.postings.get(selector, {}).get(file_id, ()))
+        return sorted(offsets)
+
+    def occurrence_count(self, selector: str) -> int:
+        """Nombre total d'occurrences d'un sélecteur dans les fichiers indexés"""
+        return sum(len(offsets) for offsets in self.postings.get(selector, {}).values())
+
+    def locations(self, selector: str) -> Dict[str, List[int]]:
+        """Fichiers et offsets où apparaît un sélecteur"""
+        return {
+            self.files[file_id]: offsets
+            for file_id, offsets in sorted(self.postings.get(selector, {}).items())
+        }
 
-                # Sélecteurs inline
-                selectors_from_inline = self.css_parser.extract_inline_selectors(content)
-                all_selectors.update(selectors_from_inline)
+    def save(self, index_file: Path):
+        """Écrit l'index (JSON compressé, offsets en deltas)"""
+        postings = {}
+        for selector, by_file in sorted(self.postings.items()):
+            encoded = {}
+            for file_id, offsets in by_file.items():
+                previous = 0
+                deltas = []
+                for offset in offsets:
+                    deltas.append(offset - previous)
+                    previous = offset
+                encoded[str(file_id)] = deltas
+            if encoded:
+                postings[selector] = encoded
+
+        data = {
+            'version': self.FORMAT_VERSION,
+            'files': self.files,
+            'file_types': self.file_types,
+            'postings': postings
+        }
+        with gzip.open(index_file, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, index_file: Path) -> 'SelectorIndex':
+        """Charge un index écrit par save()"""
+        with gzip.open(index_file, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('version') != cls.FORMAT_VERSION:
+            raise ValueError(f"Version d'index non supportée: {data.get('version')}")
+
+        index = cls()
+        index.files = data['files']
+        index.file_types = data['file_types']
+        index.file_ids = {key: file_id for file_id, key in enumerate(index.files)}
+        for selector, encoded in data['postings'].items():
+            by_file = {}
+            for file_id, deltas in encoded.items():
+                offsets = []
+                position = 0
+                for delta in deltas:
+                    position += delta
+                    offsets.append(position)
+                by_file[int(file_id)] = offsets
+                index.file_selectors.setdefault(int(file_id), set()).add(selector)
+            index.postings[selector] = by_file
+        return index
 
-                total_selectors = len(selectors_from_attrs) + len(selectors_from_style) + len(selectors_from_inline)
-                logger.debug(f"Extrait {total_selectors} sélecteurs de {html_file}")
+class SelectorExtractor:
+    """Extracteur principal de sélecteurs"""
 
-            except Exception as e:
-                logger.error(f"Erreur lors de la lecture de {html_file}: {e}")
+    # Sélecteurs jamais renommés
+    EXCLUDED_SELECTORS = frozenset({'.body', '#body', '.html', '#html', 'body', 'html'})
 
-        # JavaScript files
-        for js_file in project_files.js_files:
-            try:
-                content = js_file.read_text(encoding='utf-8')
-                selectors = self.js_parser.extract_css_references(content)
-                all_selectors.update(selectors)
-                logger.debug(f"Extrait {len(selectors)} sélecteurs de {js_file}")
-            except Exception as e:
-                logger.error(f"Erreur lors de la lecture de {js_file}: {e}")
+    def __init__(self, html_backend: str = 'html.parser', cache: Optional[ExtractionCache] = None,
+                 css_stream_threshold: int = CSS_STREAM_THRESHOLD, io_threads: int = 1):
+        self.css_parser = CSSParser()
+        self.html_parser = HTMLParser()
+        self.js_parser = JavaScriptParser()
+        self.html_backend = html_backend
+        self.cache = cache
+        # Les fichiers CSS plus gros sont analysés en flux
+        self.css_stream_threshold = css_stream_threshold
+        # Threads de lecture et d'analyse en mode mono-processus
+        self.io_threads = io_threads
+        # Métriques par fichier, renseignées par ConflictResolver
+        self.metrics: Optional['ResolutionMetrics'] = None
+        # Documents HTML analysés, conservés pour la phase de remplacement
+        self.html_documents: Dict[Path, HTMLDocument] = {}
+
+    def extract_file_selectors(self, file_path: Path, file_type: str, keep_documents: bool = False) -> Set[str]:
+        """Extrait les sélecteurs d'un seul fichier ('css', 'html' ou 'js')
+
+        Avec un cache, un fichier dont le contenu est inchangé n'est pas
+        analysé à nouveau. Un fichier CSS d'au moins css_stream_threshold
+        octets est lu et analysé par blocs ; les autres fichiers CSS et JS
+        sont analysés directement sur leur projection en mémoire.
+        """
+        return self.extract_file(file_path, file_type, keep_documents)[0]
+
+    def extract_file(self, file_path: Path, file_type: str, keep_documents: bool = False,
+                     locator: Optional[SelectorLocator] = None,
+                     scan_names: bool = False) -> Tuple[Set[str], Optional[Dict[str, List[int]]], Optional[Set[str]]]:
+        """Comme extract_file_selectors ; avec locator, relève aussi les
+        occurrences sur le contenu lu pour l'extraction (ou pour la clé de
+        cache), sans nouvelle lecture du fichier. Avec scan_names, retourne
+        aussi tous les noms préfixés du contenu brut (voir
+        SelectorLocator.prefixed_names)
+        """
+        scanning = locator is not None or scan_names
+        if file_type == 'css' and file_path.stat().st_size >= self.css_stream_threshold:
+            selectors = self._extract_css_stream(file_path)
+            if not scanning:
+                return selectors, None, None
+            # Le flux texte ne donne pas les offsets en octets
+            with mapped_file(file_path) as raw:
+                return (selectors,) + self._scan_raw(raw, file_type, locator, scan_names)
+        if file_type in ('css', 'js'):
+            return self._extract_mapped(file_path, file_type, locator, scan_names)
+
+        if self.cache is None and not scanning:
+            if file_type == 'html':
+                content = read_html_file(file_path)
+            else:
+                content = file_path.read_text(encoding='utf-8')
+            return self.extract_content_selectors(content, file_type, file_path, keep_documents), None, None
+
+        raw = file_path.read_bytes()
+        key = None
+        selectors = None
+        if self.cache is not None:
+            key = self.cache.key(raw, file_type, self.html_backend)
+            selectors = self.cache.get(key)
+        document = None
+        if selectors is None:
+            # Le HTML gardé pour la réécriture conserve ses fins de ligne
+            content = decode_source(raw, keep_newlines=file_type == 'html')
+            if file_type == 'html' and self.html_backend == 'stream':
+                # Tokenisé sur le contenu brut : réutilisé pour la localisation
+                content = document = StreamingHTMLDocument(content)
+            selectors = self.extract_content_selectors(content, file_type, file_path, keep_documents)
+            if key is not None:
+                self.cache.put(key, selectors)
+
+        return (selectors,) + self._scan_raw(raw, file_type, locator, scan_names, document)
+
+    @staticmethod
+    def _scan_raw(raw, file_type: str, locator: Optional[SelectorLocator], scan_names: bool,
+                  document: Optional[StreamingHTMLDocument] = None) -> Tuple[Optional[Dict[str, List[int]]], Optional[Set[str]]]:
+        occurrences = locator.locate(raw, file_type, document) if locator is not None else None
+        names = SelectorLocator.prefixed_names(raw) if scan_names else None
+        return occurrences, names
+
+    def _extract_mapped(self, file_path: Path, file_type: str, locator: Optional[SelectorLocator] = None,
+                        scan_names: bool = False) -> Tuple[Set[str], Optional[Dict[str, List[int]]], Optional[Set[str]]]:
+        """Extraction CSS ou JS sur le fichier projeté en mémoire, sans copie décodée"""
+        key = None
+        with mapped_file(file_path) as raw:
+            occurrences, names = self._scan_raw(raw, file_type, locator, scan_names)
+            if self.cache is not None:
+                key = self.cache.key(raw, file_type, self.html_backend)
+                selectors = self.cache.get(key)
+                if selectors is not None:
+                    return selectors, occurrences, names
+            selectors = self.extract_raw_selectors(raw, file_type)
+
+        if key is not None:
+            self.cache.put(key, selectors)
+        return selectors, occurrences, names
+
+    def extract_raw_selectors(self, raw, file_type: str) -> Set[str]:
+        """Extrait les sélecteurs d'un contenu CSS ou JS brut (bytes ou mmap)"""
+        if file_type == 'css':
+            return self.css_parser.extract_selectors_from_stream(raw)
+        return self.js_parser.extract_css_references_bytes(raw)
+
+    def _extract_css_stream(self, file_path: Path) -> Set[str]:
+        """Extraction en flux d'un gros fichier CSS, en passant par le cache"""
+        key = None
+        if self.cache is not None:
+            key = self.cache.key_file(file_path, 'css', self.html_backend)
+            selectors = self.cache.get(key)
+            if selectors is not None:
+                return selectors
+
+        with open(file_path, 'r', encoding='utf-8') as handle:
+            selectors = self.css_parser.extract_selectors_from_stream(handle)
+
+        if key is not None:
+            self.cache.put(key, selectors)
+        return selectors
+
+    def extract_content_selectors(self, content: Union[str, StreamingHTMLDocument], file_type: str,
+                                  file_path: Optional[Path] = None,
+                                  keep_documents: bool = False) -> Set[str]:
+        """Extrait les sélecteurs d'un contenu déjà lu"""
+        if file_type == 'css':
+            return self.css_parser.extract_selectors_from_css(content)
+
+        if file_type == 'html':
+            # Un seul parcours du document pour les trois extractions
+            document = HTMLDocument.ensure(content, self.html_backend)
+            if keep_documents and file_path is not None:
+                self.html_documents[file_path.resolve()] = document
+
+            selectors = set()
+            # Classes et IDs dans les attributs
+            selectors.update(self.html_parser.extract_classes_and_ids(document))
+            # Sélecteurs dans les balises <style>
+            selectors.update(self.css_parser.extract_from_style_tags(document))
+            # Sélecteurs inline
+            selectors.update(self.css_parser.extract_inline_selectors(document))
+            return selectors
+
+        return self.js_parser.extract_css_references(content)
+
+    def extract_all_selectors(self, project_files: ProjectFiles, keep_documents: bool = False,
+                              jobs: int = 1, index: Optional[SelectorIndex] = None) -> Set[str]:
+        """Extrait tous les sélecteurs d'un projet
+
+        Si keep_documents est vrai, les documents HTML analysés sont conservés
+        dans self.html_documents pour être réutilisés lors du remplacement.
+        Avec jobs > 1, les fichiers sont traités dans un pool de processus et
+        les documents ne sont pas conservés ; sinon lectures et analyses se
+        recouvrent sur io_threads threads. Si un index est fourni, les
+        occurrences des sélecteurs du projet y sont enregistrées par fichier.
+        """
+        table = SelectorTable()
+        return table.selectors(self.extract_selector_ids(project_files, table, keep_documents, jobs, index))
+
+    def extract_selector_ids(self, project_files: ProjectFiles, table: SelectorTable,
+                             keep_documents: bool = False, jobs: int = 1,
+                             index: Optional[SelectorIndex] = None, stop=None,
+                             locate: Optional[Set[str]] = None,
+                             reserved_names: Optional[Set[str]] = None) -> Set[int]:
+        """Comme extract_all_selectors, mais retourne les identifiants des
+        sélecteurs dans table, partagée entre projets
+
+        stop, s'il est fourni, reçoit les identifiants de chaque fichier dans
+        l'ordre des tâches : l'extraction s'arrête dès qu'il retourne vrai.
+        Avec un index, les occurrences sont relevées lors de la même lecture
+        de chaque fichier : celles des sélecteurs de locate s'il est fourni,
+        sinon celles de tous les sélecteurs du projet. reserved_names, s'il
+        est fourni, reçoit tous les noms préfixés du contenu brut des
+        fichiers, même hors des sélecteurs extraits (blocs @media, fichiers
+        illisibles).
+        """
+        all_ids: Set[int] = set()
+        tasks = project_files.tasks()
+        locator = SelectorLocator(locate) if index is not None else None
+        scan_names = reserved_names is not None
+        located = []
+
+        if jobs > 1 and len(tasks) > 1:
+            results = run_parallel(_extract_file_worker, tasks, jobs,
+                                   _init_extract_worker,
+                                   (self.html_backend, self.cache, self.css_stream_threshold, locator,
+                                    scan_names))
+        else:
+            results = run_threaded(lambda task: self._extract_task(task, keep_documents, locator, scan_names),
+                                   tasks, self.io_threads)
+
+        # Fusion dans l'ordre des fichiers pour des logs déterministes
+        for (file_type, file_path), (selectors, occurrences, names, error, seconds) in zip(tasks, results):
+            if self.metrics is not None:
+                self.metrics.record_file('extraction', file_type, file_path, seconds,
+                                         bytes_read=_file_size(file_path))
+            if names is not None:
+                reserved_names.update(names)
+            if error is not None:
+                logger.error(f"Erreur lors de la lecture de {file_path}: {error}")
+                continue
+            file_ids = table.add_selectors(selectors)
+            all_ids.update(file_ids)
+            if occurrences is not None:
+                located.append((file_type, file_path, occurrences))
+            logger.debug(f"Extrait {len(selectors)} sélecteurs de {file_path}")
+            if stop is not None and stop(file_ids):
+                logger.debug(f"Extraction arrêtée après {file_path}")
+                results.close()
+                break
+
+        if self.cache is not None:
+            self.cache.prune()
 
         # Exclure body et html
-        excluded = {'.body', '#body', '.html', '#html', 'body', 'html'}
-        all_selectors = all_selectors - excluded
+        all_ids -= table.add_selectors(self.EXCLUDED_SELECTORS)
+
+        if index is not None:
+            # Sans locate, les sélecteurs du projet ne sont connus qu'à la fin
+            selectors = table.selectors(all_ids) if locate is None else None
+            for file_type, file_path, occurrences in located:
+                if selectors is not None:
+                    occurrences = {
+                        selector: offsets for selector, offsets in occurrences.items()
+                        if selector in selectors
+                    }
+                index.add_file(file_path, file_type, occurrences)
+
+        return all_ids
+
+    def _index_locations(self, tasks: List[Tuple[str, Path]], selectors: Set[str],
+                         index: SelectorIndex, jobs: int):
+        """Relève les occurrences de sélecteurs connus après l'extraction
+        (sélecteurs communs, renommés) dans chaque fichier"""
+        if jobs > 1 and len(tasks) > 1:
+            results = run_parallel(_locate_file_worker, tasks, jobs, _init_locate_worker, (selectors,))
+        else:
+            locator = SelectorLocator(selectors)
+            results = run_threaded(lambda task: self._locate_task(locator, task), tasks, self.io_threads)
 
-        return all_selectors
+        for (file_type, file_path), (occurrences, error) in zip(tasks, results):
+            if error is not None:
+                logger.error(f"Erreur lors de l'indexation de {file_path}: {error}")
+                continue
+            index.add_file(file_path, file_type, occurrences)
+
+    @staticmethod
+    def _locate_task(locator: SelectorLocator,
+                     task: Tuple[str, Path]) -> Tuple[Optional[Dict[str, List[int]]], Optional[str]]:
+        file_type, file_path = task
+        try:
+            with mapped_file(file_path) as raw:
+                return locator.locate(raw, file_type), None
+        except Exception as e:
+            return None, str(e)
+
+    def _extract_task(self, task: Tuple[str, Path], keep_documents: bool,
+                      locator: Optional[SelectorLocator] = None,
+                      scan_names: bool = False) -> Tuple[Optional[Set[str]], Optional[Dict], Optional[Set[str]],
+                                                         Optional[str], float]:
+        file_type, file_path = task
+        start = time.perf_counter()
+        try:
+            selectors, occurrences, names = self.extract_file(file_path, file_type, keep_documents,
+                                                              locator, scan_names)
+            return selectors, occurrences, names, None, time.perf_counter() - start
+        except Exception as e:
+            names = None
+            if scan_names:
+                # Un fichier illisible est reproduit tel quel : ses noms restent réservés
+                with suppress(OSError, ValueError), mapped_file(file_path) as raw:
+                    names = SelectorLocator.prefixed_names(raw)
+            return None, None, names, str(e), time.perf_counter() - start
 
 class UUIDGenerator:
-    """Générateur d'UUIDs pour les sélecteurs"""
+    """Générateur des nouveaux noms des sélecteurs
+
+    Les noms sont déterministes : en mode par défaut, 'uuid-' suivi de 8
+    caractères hexadécimaux d'un SHA-256 de la graine et du sélecteur ; en
+    mode minify, les noms les plus courts (a, b, ..., aa, ...) sont attribués
+    aux sélecteurs les plus fréquents. Tout nom déjà utilisé, dans les
+    projets ou par un autre sélecteur, est écarté.
+    """
+
+    # Alphabet des noms courts : premier caractère, puis caractères suivants
+    SHORT_NAME_FIRST = 'abcdefghijklmnopqrstuvwxyz'
+    SHORT_NAME_REST = SHORT_NAME_FIRST + '0123456789'
 
     @staticmethod
-    def generate_uuid_mapping(common_selectors: Set[str]) -> Dict[str, SelectorMapping]:
-        """Génère un mapping UUID pour chaque sélecteur commun"""
+    def hashed_name(selector: str, seed: str = '', attempt: int = 0) -> str:
+        """Nom 'uuid-xxxxxxxx' dérivé de la graine et du sélecteur"""
+        digest = hashlib.sha256(f'{seed}\0{selector}\0{attempt}'.encode('utf-8')).hexdigest()
+        return f'uuid-{digest[:8]}'
+
+    @classmethod
+    def short_names(cls):
+        """Noms courts par longueur croissante : a ... z, aa ... z9, aaa ..."""
+        for length in itertools.count():
+            for first in cls.SHORT_NAME_FIRST:
+                for rest in itertools.product(cls.SHORT_NAME_REST, repeat=length):
+                    yield first + ''.join(rest)
+
+    @classmethod
+    def generate_uuid_mapping(cls, common_selectors: Set[str],
+                              previous_mapping: Optional[Dict[str, SelectorMapping]] = None,
+                              reserved_names: Optional[Set[str]] = None, seed: str = '',
+                              minify: bool = False,
+                              frequencies: Optional[Dict[str, int]] = None) -> Dict[str, SelectorMapping]:
+        """Génère un mapping pour chaque sélecteur commun
+
+        Les sélecteurs déjà présents dans previous_mapping conservent leur nom ;
+        seuls les nouveaux sélecteurs en conflit reçoivent un nouveau nom.
+        reserved_names (noms sans préfixe, par exemple tous les noms des deux
+        projets) est complété avec les noms générés, ce qui garantit des noms
+        uniques sur plusieurs appels. En mode minify, frequencies (nombre
+        d'occurrences par sélecteur) détermine l'ordre d'attribution.
+        """
         mapping = {}
-
-        for selector in common_selectors:
-            # Générer un UUID court (8 caractères)
-            short_uuid = uuid.uuid4().hex[:8]
+        previous_mapping = previous_mapping or {}
+        # Noms sans préfixe . ou # déjà attribués
+        used_names = reserved_names if reserved_names is not None else set()
+        used_names.update(
+            previous_mapping[selector].uuid_name.lstrip('.#')
+            for selector in common_selectors if selector in previous_mapping
+        )
+
+        if minify:
+            frequencies = frequencies or {}
+            order = sorted(common_selectors, key=lambda selector: (-frequencies.get(selector, 0), selector))
+            short_names = cls.short_names()
+        else:
+            order = sorted(common_selectors)
+
+        for selector in order:
+            if selector in previous_mapping:
+                mapping[selector] = previous_mapping[selector]
+                continue
+
+            # Nom distinct des noms existants et déjà attribués
+            if minify:
+                name = next(short_names)
+                while name in used_names:
+                    name = next(short_names)
+            else:
+                attempt = 0
+                name = cls.hashed_name(selector, seed)
+                while name in used_names:
+                    attempt += 1
+                    name = cls.hashed_name(selector, seed, attempt)
 
             # Déterminer le type de sélecteur
             if selector.startswith('.'):
                 selector_type = 'class'
-                new_name = f'.uuid-{short_uuid}'
+                new_name = f'.{name}'
             elif selector.startswith('#'):
                 selector_type = 'id'
-                new_name = f'#uuid-{short_uuid}'
+                new_name = f'#{name}'
             else:
                 selector_type = 'element'
-                new_name = f'uuid-{short_uuid}'
+                new_name = name
 
+            used_names.add(name)
             mapping[selector] = SelectorMapping(
                 original=selector,
                 uuid_name=new_name,
@@ -297,117 +1661,1089 @@ class UUIDGenerator:
 
         return mapping
 
+    @staticmethod
+    def load_mapping(mapping_file: Path) -> Dict[str, SelectorMapping]:
+        """Charge un selector_mapping.json produit par une exécution précédente"""
+        with open(mapping_file, 'r', encoding='utf-8') as f:
+            mapping_dict = json.load(f)
+
+        return {
+            original: SelectorMapping(**entry)
+            for original, entry in mapping_dict.items()
+        }
+
+class CSSRewriteEngine:
+    """Moteur de réécriture CSS en une seule passe
+
+    Compile l'ensemble du mapping en une seule expression régulière construite
+    à partir d'un trie des sélecteurs originaux, puis réécrit tous les
+    sélecteurs en un seul parcours gauche-droite du contenu.
+    """
+
+    # Frontière de fin de sélecteur (identique à l'ancienne boucle re.sub)
+    BOUNDARY = r'(?=[\s,{:>+~\[\]]|$)'
+
+    def __init__(self, mapping: Dict[str, SelectorMapping]):
+        self.replacements = {
+            original: selector_mapping.uuid_name
+            for original, selector_mapping in mapping.items()
+            if original
+        }
+        self.pattern = self._compile(self.replacements)
+        self._bytes_pattern = None
+        self._bytes_replacements: Dict[bytes, bytes] = {}
+
+    @classmethod
+    def _compile(cls, replacements: Dict[str, str]) -> Optional['re.Pattern']:
+        """Compile les sélecteurs en une regex unique basée sur un trie"""
+        if not replacements:
+            return None
+        return re.compile('(?:' + cls.trie_pattern(replacements) + ')' + cls.BOUNDARY)
+
+    @classmethod
+    def trie_pattern(cls, words) -> str:
+        """Regex (sans frontière) reconnaissant exactement les mots donnés"""
+        trie: Dict = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = True
+        return cls._trie_to_regex(trie)
+
+    @classmethod
+    def _trie_to_regex(cls, node: Dict) -> str:
+        """Convertit un noeud du trie en regex (branches les plus longues d'abord)"""
+        is_terminal = '' in node
+        branches = [
+            re.escape(char) + cls._trie_to_regex(child)
+            for char, child in sorted(node.items())
+            if char != ''
+        ]
+
+        if not branches:
+            return ''
+
+        if len(branches) == 1:
+            body = branches[0]
+        else:
+            body = '(?:' + '|'.join(branches) + ')'
+
+        if is_terminal:
+            # Quantificateur gourmand : la correspondance la plus longue est
+            # essayée en premier, avec retour arrière sur le préfixe terminal
+            return '(?:' + body + ')?'
+        return body
+
+    def rewrite(self, css_content: str) -> str:
+        """Réécrit tous les sélecteurs du contenu en une seule passe"""
+        if self.pattern is None:
+            return css_content
+        replacements = self.replacements
+        return self.pattern.sub(lambda match: replacements[match.group(0)], css_content)
+
+    def edits(self, css_content: str, offset: int = 0) -> List[Tuple[int, int, str]]:
+        """Éditions de rewrite : un span par sélecteur renommé, décalé de offset"""
+        if self.pattern is None:
+            return []
+        replacements = self.replacements
+        return [
+            (offset + match.start(), offset + match.end(), replacements[match.group(0)])
+            for match in self.pattern.finditer(css_content)
+        ]
+
+    # Dernier caractère après lequel un bloc peut être coupé : aucun sélecteur
+    # ne le contient et la frontière d'une correspondance reste dans le bloc
+    STREAM_SPLIT = re.compile(r'[\s{};][^\s{};]*\Z')
+
+    def rewrite_stream(self, source, destination, chunk_size: int = STREAM_CHUNK_SIZE):
+        """Réécrit un flux texte vers un autre bloc par bloc, en mémoire constante"""
+        pending = ''
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                destination.write(self.rewrite(pending))
+                return
+            pending += chunk
+            split = self.STREAM_SPLIT.search(pending)
+            if split is not None:
+                destination.write(self.rewrite(pending[:split.start() + 1]))
+                pending = pending[split.start() + 1:]
+
+    def rewrite_spans(self, raw: bytes, offsets: List[int]) -> bytes:
+        """Réécrit uniquement aux offsets relevés par l'index (contenu brut)
+
+        Chaque offset désigne le début du nom d'un sélecteur ; la
+        correspondance est tentée sur le préfixe . ou # qui le précède, puis
+        sur le nom lui-même. Les octets hors des spans réécrits sont
+        conservés tels quels.
+        """
+        if self.pattern is None or not offsets:
+            return raw
+        return apply_edits(raw, self.byte_edits(raw, offsets))
+
+    def byte_edits(self, raw, offsets: Optional[List[int]] = None) -> List[Tuple[int, int, bytes]]:
+        """Éditions (offsets en octets) d'un contenu brut, bytes ou mmap
+
+        Sans offsets, tout le contenu est parcouru ; sinon seuls les spans
+        relevés par l'index sont essayés, comme dans rewrite_spans.
+        """
+        return list(self.iter_byte_edits(raw, offsets))
+
+    def iter_byte_edits(self, raw, offsets: Optional[List[int]] = None):
+        """Comme byte_edits, produites au fil du parcours"""
+        if self.pattern is None:
+            return
+
+        if self._bytes_pattern is None:
+            self._bytes_pattern = re.compile(self.pattern.pattern.encode('utf-8'))
+            self._bytes_replacements = {
+                original.encode('utf-8'): new_name.encode('utf-8')
+                for original, new_name in self.replacements.items()
+            }
+        replacements = self._bytes_replacements
+
+        if offsets is None:
+            for match in self._bytes_pattern.finditer(raw):
+                yield match.start(), match.end(), replacements[match.group(0)]
+            return
+
+        position = 0
+        for offset in offsets:
+            for start in (offset - 1, offset):
+                if start < position:
+                    continue
+                match = self._bytes_pattern.match(raw, start)
+                if match:
+                    yield start, match.end(), replacements[match.group(0)]
+                    position = match.end()
+                    break
+
+    @staticmethod
+    def rewrite_sequential(mapping: Dict[str, SelectorMapping], css_content: str) -> str:
+        """Implémentation de référence : un re.sub par entrée du mapping"""
+        modified_content = css_content
+
+        for original, selector_mapping in mapping.items():
+            pattern = re.escape(original) + CSSRewriteEngine.BOUNDARY
+            modified_content = re.sub(pattern, selector_mapping.uuid_name, modified_content)
+
+        return modified_content
+
+    @classmethod
+    def benchmark(cls, mapping: Dict[str, SelectorMapping], css_content: str, repeat: int = 3) -> Dict:
+        """Compare le moteur en une passe à la boucle re.sub séquentielle"""
+        start = time.perf_counter()
+        engine = cls(mapping)
+        compile_time = time.perf_counter() - start
+
+        single_pass_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            single_pass_result = engine.rewrite(css_content)
+            single_pass_times.append(time.perf_counter() - start)
+
+        sequential_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            sequential_result = cls.rewrite_sequential(mapping, css_content)
+            sequential_times.append(time.perf_counter() - start)
+
+        single_pass = min(single_pass_times)
+        sequential = min(sequential_times)
+
+        return {
+            'selectors': len(mapping),
+            'css_bytes': len(css_content.encode('utf-8')),
+            'compile_seconds': compile_time,
+            'single_pass_seconds': single_pass,
+            'sequential_seconds': sequential,
+            'speedup': sequential / single_pass if single_pass else float('inf'),
+            'identical_output': single_pass_result == sequential_result
+        }
+
+class SourceMap:
+    """Mise à jour d'une source map v3 après des éditions de son fichier généré
+
+    Les éditions ne contiennent jamais de fin de ligne : seules les colonnes
+    générées (en unités UTF-16) des segments situés après une édition, sur
+    la même ligne, sont décalées. Les autres champs des segments et les
+    lignes sans édition sont conservés tels quels.
+    """
+
+    # Commentaire //# sourceMappingURL=... (ou /*# ... */) en fin de fichier
+    URL_PATTERN = re.compile(rb'(?://|/\*)[#@]\s*sourceMappingURL=([^\s\'"*]+)')
+    TAIL_SIZE = 4096
+    BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+    BASE64_VALUES = {char: value for value, char in enumerate(BASE64)}
+
+    @classmethod
+    def url(cls, raw) -> Optional[str]:
+        """URL relative de la source map référencée en fin de contenu, ou None"""
+        matches = list(cls.URL_PATTERN.finditer(raw, max(0, len(raw) - cls.TAIL_SIZE)))
+        if not matches:
+            return None
+        url = matches[-1].group(1).decode('utf-8', errors='replace')
+        if url.startswith(('data:', '/')) or '://' in url:
+            return None
+        return unquote(url)
+
+    @classmethod
+    def url_of(cls, file_path: Path) -> Optional[str]:
+        """Comme url, en ne lisant que la fin du fichier"""
+        with open(file_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - cls.TAIL_SIZE))
+            return cls.url(f.read())
+
+    @staticmethod
+    def utf16_length(raw) -> int:
+        return len(raw.decode('utf-8', errors='replace').encode('utf-16-le')) // 2
+
+    @classmethod
+    def shift(cls, data: Dict, raw, edits: List[Tuple[int, int, bytes]]) -> Dict:
+        """Source map décalée pour les éditions (offsets en octets) du contenu raw"""
+        if 'sections' in data or not isinstance(data.get('mappings'), str):
+            return data
+
+        line_starts = [0] + [match.end() for match in re.finditer(b'\n', raw)]
+        shifts: Dict[int, List[Tuple[int, int, int]]] = {}
+        for start, end, replacement in edits:
+            line = bisect.bisect_right(line_starts, start) - 1
+            column = cls.utf16_length(raw[line_starts[line]:start])
+            old_length = cls.utf16_length(raw[start:end])
+            new_length = cls.utf16_length(replacement)
+            shifts.setdefault(line, []).append((column, column + old_length, new_length - old_length))
+
+        lines = data['mappings'].split(';')
+        for line, line_shifts in shifts.items():
+            if line < len(lines) and lines[line]:
+                lines[line] = cls._shift_line(lines[line], line_shifts)
+        return dict(data, mappings=';'.join(lines))
+
+    @classmethod
+    def _shift_line(cls, line: str, shifts: List[Tuple[int, int, int]]) -> str:
+        segments = []
+        column = 0
+        previous = 0
+        for segment in line.split(','):
+            delta, rest = cls._decode_vlq(segment)
+            column += delta
+            shifted = column
+            for start, end, change in shifts:
+                if column >= end:
+                    shifted += change
+                elif column > start:
+                    # Segment à l'intérieur d'un nom remplacé : borné au nouveau nom
+                    shifted += min(0, end - start + change - (column - start))
+                    break
+                else:
+                    break
+            segments.append(cls._encode_vlq(shifted - previous) + rest)
+            previous = shifted
+        return ','.join(segments)
+
+    @classmethod
+    def _decode_vlq(cls, segment: str) -> Tuple[int, str]:
+        """Premier champ VLQ d'un segment et le reste du segment"""
+        value = 0
+        for position, char in enumerate(segment):
+            digit = cls.BASE64_VALUES[char]
+            value += (digit & 31) << (5 * position)
+            if not digit & 32:
+                return (-(value >> 1) if value & 1 else value >> 1), segment[position + 1:]
+        raise ValueError(f"Segment VLQ invalide: {segment!r}")
+
+    @classmethod
+    def _encode_vlq(cls, value: int) -> str:
+        value = ((-value) << 1) | 1 if value < 0 else value << 1
+        chars = []
+        while True:
+            digit = value & 31
+            value >>= 5
+            chars.append(cls.BASE64[digit | 32 if value else digit])
+            if not value:
+                return ''.join(chars)
+
 class FileReplacer:
     """Remplacement des sélecteurs dans les fichiers"""
 
-    def __init__(self, mapping: Dict[str, SelectorMapping]):
+    # Liste des éditions du mode splice, écrite dans le répertoire de sortie
+    EDIT_LIST_FILE = 'selector_edits.json'
+
+    def __init__(self, mapping: Dict[str, SelectorMapping], html_backend: str = 'html.parser',
+                 css_stream_threshold: int = CSS_STREAM_THRESHOLD, splice: bool = False,
+                 link_assets: bool = True):
         self.mapping = mapping
+        self.css_engine = CSSRewriteEngine(mapping)
+        self.html_backend = html_backend
+        # Nouveaux noms sans préfixe, par nom d'origine sans préfixe : les
+        # attributs class et id sont recherchés sans construire '.nom' / '#nom'
+        self.class_names: Dict[str, str] = {}
+        self.id_names: Dict[str, str] = {}
+        for original, selector_mapping in mapping.items():
+            kind, name = SelectorTable.split(original)
+            if kind == SelectorTable.CLASS:
+                self.class_names[name] = selector_mapping.uuid_name[1:]
+            elif kind == SelectorTable.ID:
+                self.id_names[name] = selector_mapping.uuid_name[1:]
+        # Les fichiers CSS plus gros sont réécrits en flux
+        self.css_stream_threshold = css_stream_threshold
+        # Réécriture par éditions ponctuelles du contenu brut (voir splice_file)
+        self.splice = splice
+        # Source reproduite (lien ou copie) si sa réécriture échoue
+        self.link_assets = link_assets
 
     def replace_in_css(self, css_content: str) -> str:
         """Remplace les sélecteurs dans le contenu CSS"""
-        modified_content = css_content
+        return self.css_engine.rewrite(css_content)
 
-        for original, selector_mapping in self.mapping.items():
-            # Remplacement dans les sélecteurs CSS
-            # Utiliser une regex plus précise pour éviter les faux positifs
-            pattern = re.escape(original) + r'(?=[\s,{:>+~\[\]]|$)'
-            modified_content = re.sub(pattern, selector_mapping.uuid_name, modified_content)
+    def replace_in_html(self, html_content: Union[str, HTMLDocument, StreamingHTMLDocument]) -> str:
+        """Remplace les sélecteurs dans le HTML
 
-        return modified_content
+        Accepte le texte HTML ou un document déjà analysé lors de
+        l'extraction, auquel cas le document n'est pas analysé à nouveau.
+        """
+        document = HTMLDocument.ensure(html_content, self.html_backend)
 
-    def replace_in_html(self, html_content: str) -> str:
-        """Remplace les sélecteurs dans le HTML"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if isinstance(document, StreamingHTMLDocument):
+            return document.rewrite(self.class_names.get, self.id_names.get, self.css_engine.edits)
 
         # Remplacer dans les attributs class
-        for element in soup.find_all(class_=True):
+        class_names = self.class_names
+        for element in document.class_elements:
             classes = element.get('class', [])
             if isinstance(classes, str):
                 classes = classes.split()
 
-            new_classes = []
-            for cls in classes:
-                original_selector = f'.{cls}'
-                if original_selector in self.mapping:
-                    new_cls = self.mapping[original_selector].uuid_name[1:]  # Enlever le '.'
-                    new_classes.append(new_cls)
-                else:
-                    new_classes.append(cls)
-
-            element['class'] = new_classes
+            element['class'] = [class_names.get(cls, cls) for cls in classes]
 
         # Remplacer dans les attributs id
-        for element in soup.find_all(id=True):
-            element_id = element.get('id')
-            original_selector = f'#{element_id}'
-            if original_selector in self.mapping:
-                new_id = self.mapping[original_selector].uuid_name[1:]  # Enlever le '#'
+        for element in document.id_elements:
+            new_id = self.id_names.get(element.get('id'))
+            if new_id is not None:
                 element['id'] = new_id
 
         # Remplacer dans les balises <style>
-        for style_tag in soup.find_all('style'):
+        for style_tag in document.style_tags:
             if style_tag.string:
                 style_tag.string = self.replace_in_css(style_tag.string)
 
         # Remplacer dans les attributs style (plus complexe)
-        for element in soup.find_all(style=True):
+        for element in document.inline_style_elements:
             style_attr = element.get('style', '')
             element['style'] = self.replace_in_css(style_attr)
 
-        return str(soup)
+        return str(document.soup)
+
+    def replace_in_file(self, file_path: Path, file_type: str, document=None):
+        """Réécrit un fichier en place selon son type ('css', 'html' ou 'js')"""
+        self.rewrite_file(file_path, file_path, file_type, document)
+
+    def rewrite_file(self, source_path: Path, destination_path: Path, file_type: str, document=None,
+                     offsets: Optional[List[int]] = None) -> Optional[List[List]]:
+        """Lit source_path, remplace les sélecteurs et écrit destination_path
+
+        Pour un fichier CSS, offsets (issus d'un SelectorIndex) limite la
+        réécriture aux spans relevés. En mode splice, retourne les éditions
+        appliquées (voir splice_file).
+
+        La sortie est écrite dans un fichier temporaire puis renommée : elle
+        n'est jamais tronquée ni écrite à travers un lien physique vers la
+        source. Si la réécriture échoue, la source est reproduite telle
+        quelle (lien ou copie) et l'erreur est propagée.
+        """
+        fd, tmp_name = tempfile.mkstemp(prefix=f'.{destination_path.name}.', suffix='.tmp',
+                                        dir=destination_path.parent)
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            edits = self._write_rewritten(source_path, tmp_path, file_type, document, offsets)
+            shutil.copymode(source_path, tmp_path)
+            os.replace(tmp_path, destination_path)
+        except BaseException:
+            with suppress(OSError):
+                tmp_path.unlink()
+            if source_path != destination_path:
+                with suppress(OSError):
+                    link_or_copy(source_path, destination_path, self.link_assets)
+            raise
+        return edits
+
+    def _write_rewritten(self, source_path: Path, destination_path: Path, file_type: str, document=None,
+                         offsets: Optional[List[int]] = None) -> Optional[List[List]]:
+        if self.splice:
+            return self.splice_file(source_path, destination_path, file_type, document, offsets)
+
+        if file_type == 'css' and source_path.stat().st_size >= self.css_stream_threshold:
+            # Réécriture en flux, en mémoire constante : les offsets de
+            # l'index (proportionnels au fichier) ne sont pas utilisés
+            with open(source_path, 'r', encoding='utf-8', newline='') as source, \
+                    open(destination_path, 'w', encoding='utf-8', newline='') as destination:
+                self.css_engine.rewrite_stream(source, destination)
+        elif file_type == 'css' and offsets is not None:
+            # Source projetée en mémoire, sortie écrite par morceaux
+            with mapped_file(source_path) as raw, open(destination_path, 'wb') as destination:
+                destination.writelines(iter_spliced(raw, self.css_engine.iter_byte_edits(raw, offsets)))
+        elif file_type == 'html':
+            if document is None:
+                document = read_html_file(source_path)
+            content = self.replace_in_html(document)
+            if self.html_backend != 'stream':
+                # BeautifulSoup réduit les blancs entre balises à \n
+                content = restore_newlines(content, source_path)
+            write_html_file(destination_path, content)
+        elif file_type == 'css':
+            write_source_text(destination_path, self.replace_in_css(read_source_text(source_path)))
+        else:
+            write_source_text(destination_path, self.replace_in_js(read_source_text(source_path)))
+        return None
+
+    def splice_file(self, source_path: Path, destination_path: Path, file_type: str, document=None,
+                    offsets: Optional[List[int]] = None) -> List[List]:
+        """Réécrit un fichier par éditions du contenu brut
+
+        Hors des noms renommés, les octets de la sortie sont ceux de la source
+        (fins de ligne et encodage compris) ; le HTML est toujours découpé par
+        le tokenizer en flux. Retourne les éditions [début, fin, original,
+        remplacement], offsets en octets dans la source. La source map
+        référencée par un fichier CSS ou JS modifié est décalée dans la sortie.
+        """
+        with mapped_file(source_path) as raw:
+            if file_type == 'css':
+                edits = self.css_engine.byte_edits(raw, offsets)
+            else:
+                content = raw[:].decode('utf-8')
+                if file_type == 'html':
+                    if not isinstance(document, StreamingHTMLDocument):
+                        document = StreamingHTMLDocument(content)
+                    edits = encode_edits(content, document.edits(
+                        self.class_names.get, self.id_names.get, self.css_engine.edits
+                    ))
+                else:
+                    edits = encode_edits(content, self.js_edits(content))
+
+            with open(destination_path, 'wb') as destination:
+                destination.writelines(iter_spliced(raw, edits))
+
+            if edits and file_type in ('css', 'js'):
+                self._shift_source_map(source_path, destination_path, raw, edits)
+
+            return [
+                [start, end, raw[start:end].decode('utf-8'), replacement.decode('utf-8')]
+                for start, end, replacement in edits
+            ]
+
+    @staticmethod
+    def _shift_source_map(source_path: Path, destination_path: Path, raw,
+                          edits: List[Tuple[int, int, bytes]]):
+        """Décale la source map de la sortie, si elle y a été reproduite"""
+        url = SourceMap.url(raw)
+        if url is None:
+            return
+        map_source = source_path.parent / url
+        map_destination = destination_path.parent / url
+        if not map_source.is_file() or not map_destination.exists():
+            return
+
+        try:
+            with open(map_source, 'r', encoding='utf-8') as f:
+                data = SourceMap.shift(json.load(f), raw, edits)
+            # Ne jamais écrire à travers un lien physique vers la source
+            map_destination.unlink()
+            with open(map_destination, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Source map {map_source} non mise à jour: {e}")
 
     def replace_in_js(self, js_content: str) -> str:
-        """Remplace les sélecteurs dans le JavaScript"""
-        modified_content = js_content
-
-        for original, selector_mapping in self.mapping.items():
-            # Remplacement dans les chaînes JavaScript
-            patterns = [
-                # querySelector et querySelectorAll avec guillemets simples
-                f"'\\{original}'",
-                # querySelector et querySelectorAll avec guillemets doubles
-                f'"\\{original}"',
-                # getElementById et getElementsByClassName (sans le . ou #)
-                f"'{original[1:]}'" if original.startswith(('.', '#')) else f"'{original}'",
-                f'"{original[1:]}"' if original.startswith(('.', '#')) else f'"{original}"',
+        """Remplace les sélecteurs dans le JavaScript
+
+        Un seul parcours : les arguments des API reconnues sont réécrits selon
+        leur type (sélecteur, id ou classes) et tout autre littéral chaîne égal
+        à un sélecteur préfixé du mapping (ex: '.button') est remplacé.
+        """
+        return apply_edits(js_content, self.js_edits(js_content))
+
+    def js_edits(self, js_content: str) -> List[Tuple[int, int, str]]:
+        """Éditions de replace_in_js, limitées aux noms renommés dans les chaînes"""
+        edits = []
+        for match in JavaScriptParser.REWRITE_PATTERN.finditer(js_content):
+            edits.extend(self._js_match_edits(match))
+        return edits
+
+    def _js_match_edits(self, match) -> List[Tuple[int, int, str]]:
+        value = match.group('value')
+        start, end = match.span('value')
+        kind = JavaScriptParser.api_kind(match)
+
+        if kind == 'selector':
+            return self.css_engine.edits(value, start)
+        if kind == 'class':
+            class_names = self.class_names
+            return [
+                (start + token.start(), start + token.end(), class_names[token.group(0)])
+                for token in StreamingHTMLDocument.CLASS_TOKEN.finditer(value)
+                if class_names.get(token.group(0))
             ]
 
-            for pattern in patterns:
-                replacement = pattern.replace(original, selector_mapping.uuid_name)
-                modified_content = modified_content.replace(pattern, replacement)
+        if kind == 'id':
+            new_value = self.id_names.get(value.strip())
+        elif value in self.mapping and value.startswith(('.', '#')):
+            new_value = self.mapping[value].uuid_name
+        else:
+            return []
 
-        return modified_content
+        if not new_value or new_value == value:
+            return []
+        return [(start, end, new_value)]
+
+class OutputManifest:
+    """Empreintes des fichiers de sortie pour le mode incrémental
+
+    L'empreinte d'un fichier combine son contenu source, le backend HTML
+    (et le mode splice), PARSER_VERSION et les entrées du mapping dont le
+    nom apparaît dans le fichier. Un fichier dont l'empreinte n'a pas changé depuis l'exécution
+    précédente n'a pas besoin d'être réécrit. Le manifeste liste aussi tous
+    les fichiers de sortie, ce qui permet de supprimer ceux dont la source a
+    disparu.
+    """
+
+    FILE_NAME = 'selector_manifest.json'
+
+    def __init__(self, mapping: Dict[str, SelectorMapping], html_backend: str = 'html.parser',
+                 splice: bool = False):
+        self.mapping = mapping
+        self.html_backend = html_backend
+        self.splice = splice
+        # Nom sans préfixe -> sélecteurs originaux (.nom et #nom)
+        self.originals_by_name: Dict[str, List[str]] = {}
+        for original in mapping:
+            name = original.lstrip('.#')
+            if name:
+                self.originals_by_name.setdefault(name, []).append(original)
+        # Recherche chevauchante : le lookahead essaie chaque position
+        self.name_pattern = None
+        if self.originals_by_name:
+            self.name_pattern = re.compile(
+                '(?=(' + CSSRewriteEngine.trie_pattern(self.originals_by_name) + '))'
+            )
+
+    def relevant_selectors(self, content: str) -> List[str]:
+        """Sélecteurs du mapping dont le nom apparaît dans le contenu"""
+        if self.name_pattern is None:
+            return []
+        names = set(self.name_pattern.findall(content))
+        return sorted(
+            original
+            for name in names
+            for original in self.originals_by_name[name]
+        )
+
+    def fingerprint(self, raw: bytes) -> str:
+        """Empreinte d'un fichier source pour le mapping courant"""
+        digest = hashlib.sha256()
+        digest.update(f'{PARSER_VERSION}\0{self.html_backend}\0'.encode('utf-8'))
+        if self.splice:
+            digest.update(b'splice\0')
+        digest.update(hashlib.sha256(raw).digest())
+        for original in self.relevant_selectors(raw.decode('utf-8', errors='replace')):
+            digest.update(f'{original}\0{self.mapping[original].uuid_name}\0'.encode('utf-8'))
+        return digest.hexdigest()
+
+    @classmethod
+    def load(cls, manifest_file: Path) -> Tuple[Dict[str, str], Set[str]]:
+        """Charge les empreintes et les fichiers de sortie précédents (vides si
+        absent ou illisible)"""
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}, set()
+        if not isinstance(data, dict):
+            return {}, set()
+        if 'outputs' not in data:
+            # Ancien format : empreintes des seuls fichiers texte
+            return data, set(data)
+        return data.get('fingerprints', {}), set(data['outputs'])
+
+    @staticmethod
+    def save(manifest_file: Path, fingerprints: Dict[str, str], outputs: Set[str]):
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprints': fingerprints, 'outputs': sorted(outputs)},
+                      f, indent=2, sort_keys=True, ensure_ascii=False)
+
+def link_or_copy(source: Path, destination: Path, link: bool = True):
+    """Reproduit un fichier non modifié : reflink, puis lien physique, puis copie
+
+    Un reflink (clonage copy-on-write) partage les blocs sans risque de
+    modification croisée ; à défaut, un lien physique partage le fichier
+    lui-même. Avec link=False, le fichier est toujours copié.
+    """
+    if destination.exists() or destination.is_symlink():
+        if link and os.path.samefile(source, destination):
+            return
+        destination.unlink()
+
+    if link:
+        try:
+            import fcntl
+            with open(source, 'rb') as src, open(destination, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), 0x40049409, src.fileno())  # FICLONE
+            shutil.copystat(source, destination)
+            return
+        except (ImportError, OSError):
+            if destination.exists():
+                destination.unlink()
+        try:
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+
+    shutil.copy2(source, destination)
+
+def _same_file_stat(src, dst) -> bool:
+    """Vrai si dst a la même taille et la même date que src (copie inchangée)"""
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+    except OSError:
+        return False
+    return src_stat.st_size == dst_stat.st_size and int(src_stat.st_mtime) == int(dst_stat.st_mtime)
+
+def _file_size(path) -> int:
+    """Taille d'un fichier, 0 s'il a disparu ou est illisible"""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+class ResolutionMetrics:
+    """Métriques d'une résolution
+
+    Pour chaque phase : temps réel, temps CPU (processus de travail
+    compris), fichiers traités et octets lus/écrits, détaillés par type de
+    fichier. Les fichiers les plus lents sont conservés dans un tas borné.
+    """
+
+    def __init__(self, slowest: int = 10):
+        self.slowest = slowest
+        self.reset()
+
+    def reset(self):
+        self.phases: Dict[str, Dict] = {}
+        self.memory: Optional[Dict] = None
+        self._slowest_files: List[Tuple[float, str, str, str]] = []
+
+    @staticmethod
+    def _counters() -> Dict:
+        return {'files': 0, 'bytes_read': 0, 'bytes_written': 0, 'seconds': 0.0}
+
+    def _phase_entry(self, name: str) -> Dict:
+        if name not in self.phases:
+            self.phases[name] = dict(wall_seconds=0.0, cpu_seconds=0.0, **self._counters(), file_types={})
+        return self.phases[name]
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mesure le temps réel et CPU d'une phase"""
+        entry = self._phase_entry(name)
+        start = time.perf_counter()
+        # user + system du processus et des processus fils terminés
+        cpu_start = sum(os.times()[:4])
+        try:
+            yield
+        finally:
+            entry['wall_seconds'] += time.perf_counter() - start
+            entry['cpu_seconds'] += sum(os.times()[:4]) - cpu_start
+
+    def record_file(self, phase: str, file_type: str, path: Path, seconds: float,
+                    bytes_read: int = 0, bytes_written: int = 0):
+        """Enregistre le traitement d'un fichier dans une phase"""
+        entry = self._phase_entry(phase)
+        by_type = entry['file_types'].setdefault(file_type, self._counters())
+        for counters in (entry, by_type):
+            counters['files'] += 1
+            counters['bytes_read'] += bytes_read
+            counters['bytes_written'] += bytes_written
+            counters['seconds'] += seconds
+
+        item = (seconds, phase, file_type, str(path))
+        if len(self._slowest_files) < self.slowest:
+            heapq.heappush(self._slowest_files, item)
+        elif item > self._slowest_files[0]:
+            heapq.heapreplace(self._slowest_files, item)
+
+    def slowest_files(self) -> List[Dict]:
+        return [
+            {'path': path, 'phase': phase, 'file_type': file_type, 'seconds': seconds}
+            for seconds, phase, file_type, path in sorted(self._slowest_files, reverse=True)
+        ]
+
+    def to_dict(self) -> Dict:
+        result = {
+            'phases': self.phases,
+            'total_wall_seconds': sum(phase['wall_seconds'] for phase in self.phases.values()),
+            'total_cpu_seconds': sum(phase['cpu_seconds'] for phase in self.phases.values()),
+            'slowest_files': self.slowest_files()
+        }
+        if self.memory is not None:
+            result['memory'] = self.memory
+        return result
+
+    def save(self, metrics_file: Path, **extra):
+        metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(metrics_file, 'w', encoding='utf-8') as f:
+            json.dump(dict(extra, **self.to_dict()), f, indent=2, ensure_ascii=False)
+
+    def log_summary(self):
+        for name, phase in self.phases.items():
+            logger.debug(f"Phase {name}: {phase['wall_seconds']:.3f}s réel, {phase['cpu_seconds']:.3f}s CPU, "
+                         f"{phase['files']} fichiers, {phase['bytes_read']} octets lus, "
+                         f"{phase['bytes_written']} octets écrits")
 
 class ConflictResolver:
     """Résolveur principal de conflits CSS"""
 
-    def __init__(self):
-        self.extractor = SelectorExtractor()
-        self.file_collector = FileCollector()
+    def __init__(self, html_backend: str = 'html.parser', jobs: int = 1,
+                 cache: Optional[ExtractionCache] = None, link_assets: bool = True,
+                 index_file: Optional[Path] = None, css_stream_threshold: int = CSS_STREAM_THRESHOLD,
+                 name_seed: Optional[str] = None, minify_names: bool = False,
+                 io_threads: int = IO_THREADS, ignored: Optional[List[str]] = None,
+                 splice: bool = False):
+        self.html_backend = html_backend
+        self.jobs = jobs
+        self.io_threads = io_threads
+        self.link_assets = link_assets
+        self.index_file = index_file
+        self.css_stream_threshold = css_stream_threshold
+        # Graine des noms générés (défaut : nom du projet renommé) et mode minify
+        self.name_seed = name_seed
+        self.minify_names = minify_names
+        # Réécriture par éditions ponctuelles, avec liste des éditions
+        self.splice = splice
+        self.extractor = SelectorExtractor(html_backend, cache, css_stream_threshold, io_threads)
+        self.file_collector = FileCollector(ignored)
+        # Index des sélecteurs de la dernière résolution, complet si keep_index
+        self.keep_index = False
+        self.index: Optional[SelectorIndex] = None
+        # Métriques de la dernière résolution
+        self.metrics = ResolutionMetrics()
+        self.extractor.metrics = self.metrics
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Durée (secondes) de chaque phase de la dernière résolution"""
+        return {name: phase['wall_seconds'] for name, phase in self.metrics.phases.items()}
+
+    def _phase(self, name: str):
+        """Mesure le temps et les fichiers traités d'une phase"""
+        return self.metrics.phase(name)
+
+    def _seed_for(self, project_path: Path) -> str:
+        """Graine des noms générés pour un projet renommé"""
+        return self.name_seed if self.name_seed is not None else project_path.resolve().name
+
+    def _rewrite_task(self, replacer: FileReplacer,
+                      task: Tuple[str, Path, Path, Optional[List[int]]]) -> Tuple[Optional[List], Optional[str], float]:
+        """Réécrit un fichier source vers sa destination en réutilisant son document HTML"""
+        file_type, source_path, destination_path, offsets = task
+        start = time.perf_counter()
+        try:
+            document = None
+            if file_type == 'html':
+                document = self.extractor.html_documents.pop(source_path.resolve(), None)
+            edits = replacer.rewrite_file(source_path, destination_path, file_type, document, offsets)
+            return edits, None, time.perf_counter() - start
+        except Exception as e:
+            return False, str(e), time.perf_counter() - start
+
+    def _copy_task(self, task: Tuple[Path, Path, bool]) -> Tuple[bool, Optional[str], float]:
+        """Lie ou copie un fichier ; ignoré si incrémental et inchangé"""
+        source_path, destination_path, incremental = task
+        start = time.perf_counter()
+        if incremental and _same_file_stat(source_path, destination_path):
+            return False, None, 0.0
+        try:
+            link_or_copy(source_path, destination_path, self.link_assets)
+            return True, None, time.perf_counter() - start
+        except OSError as e:
+            return False, str(e), time.perf_counter() - start
+
+    @staticmethod
+    def _fingerprint_task(manifest: 'OutputManifest', source_path: Path) -> Tuple[str, int, float]:
+        start = time.perf_counter()
+        raw = source_path.read_bytes()
+        return manifest.fingerprint(raw), len(raw), time.perf_counter() - start
+
+    def _plan_outputs(self, demo_project_path: Path, output_path: Path,
+                      exclude: Optional[Path] = None) -> Tuple[List[Tuple[str, Path, Path]], List[Tuple[Path, Path]]]:
+        """Parcourt la démo une fois et crée l'arborescence de sortie
+
+        Retourne les tâches (type, source, destination) des fichiers texte,
+        ordonnées CSS, HTML puis JS, et les couples (source, destination) des
+        autres fichiers. Les fichiers des répertoires ignorés par le
+        collecteur sont repris tels quels. Le répertoire exclude (défaut :
+        output_path) n'est pas parcouru.
+        """
+        text_tasks = []
+        assets = []
+
+        for root_path, files, ignored in self.file_collector.walk(demo_project_path, exclude or output_path,
+                                                                  include_ignored=True):
+            destination_dir = output_path / root_path.relative_to(demo_project_path)
+            destination_dir.mkdir(parents=True, exist_ok=True)
+
+            for entry in files:
+                source_file = root_path / entry.name
+                file_type = None if ignored else FILE_TYPES.get(source_file.suffix)
+                if file_type is None:
+                    assets.append((source_file, destination_dir / entry.name))
+                else:
+                    text_tasks.append((file_type, source_file, destination_dir / entry.name))
+
+        type_order = {'css': 0, 'html': 1, 'js': 2}
+        text_tasks.sort(key=lambda task: type_order[task[0]])
+        return text_tasks, assets
+
+    def write_outputs(self, project_path: Path, output_path: Path, mapping: Dict[str, SelectorMapping],
+                      index: Optional[SelectorIndex] = None, incremental: bool = False,
+                      exclude: Optional[Path] = None) -> Tuple[int, List[str], List[str]]:
+        """Écrit la sortie d'un projet : les fichiers texte passent directement
+        par le remplaceur, les autres sont liés ou copiés
+
+        Les sorties d'une exécution précédente dont la source a disparu sont
+        supprimées. Retourne le nombre de fichiers réécrits, la liste
+        (relative) des fichiers de sortie modifiés ou supprimés et celle des
+        seuls fichiers supprimés. En mode splice, les éditions de chaque
+        fichier sont écrites dans FileReplacer.EDIT_LIST_FILE.
+        """
+        output_path.mkdir(parents=True, exist_ok=True)
+        replacer = FileReplacer(mapping, self.html_backend, self.css_stream_threshold, self.splice,
+                                self.link_assets)
+        files_processed = 0
+        manifest_file = output_path / OutputManifest.FILE_NAME
+        edit_list_file = output_path / FileReplacer.EDIT_LIST_FILE
+        fingerprints: Dict[str, str] = {}
+        unchanged: Set[str] = set()
+        changed_files: List[str] = []
+        edit_list: Dict[str, List[List]] = {}
+
+        text_tasks, assets = self._plan_outputs(project_path, output_path, exclude)
+        planned = {destination.relative_to(output_path).as_posix() for _, _, destination in text_tasks}
+        planned.update(destination.relative_to(output_path).as_posix() for _, destination in assets)
+        previous_fingerprints, previous_outputs = OutputManifest.load(manifest_file)
+
+        # Sorties de l'exécution précédente dont la source a disparu
+        deleted_files: List[str] = []
+        root = output_path.resolve()
+        for relative in sorted(previous_outputs - planned):
+            destination = output_path / relative
+            if not destination.resolve().is_relative_to(root):
+                continue
+            try:
+                destination.unlink()
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.error(f"Erreur lors de la suppression de {destination}: {e}")
+                continue
+            deleted_files.append(relative)
+            # Répertoires devenus vides
+            parent = destination.parent
+            while parent != output_path:
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break
+                parent = parent.parent
+        if deleted_files:
+            logger.info(f"{len(deleted_files)} fichiers de sortie supprimés (source disparue)")
+        changed_files.extend(deleted_files)
+
+        # Source maps des fichiers CSS et JS : décalées lors de la réécriture
+        # de leur fichier, elles ne sont pas recopiées si celui-ci est inchangé
+        map_owners: Dict[str, str] = {}
+        if self.splice:
+            for file_type, source_file, destination in text_tasks:
+                url = SourceMap.url_of(source_file) if file_type in ('css', 'js') else None
+                if url is not None:
+                    map_owners[os.path.normpath(source_file.parent / url)] = \
+                        destination.relative_to(output_path).as_posix()
+
+        if incremental:
+            with self._phase('manifest'):
+                manifest = OutputManifest(mapping, self.html_backend, self.splice)
+                results = run_threaded(lambda source_file: self._fingerprint_task(manifest, source_file),
+                                       [source_file for _, source_file, _ in text_tasks], self.io_threads)
+                for (file_type, source_file, destination), (fingerprint, size, seconds) in zip(text_tasks, results):
+                    relative = destination.relative_to(output_path).as_posix()
+                    fingerprints[relative] = fingerprint
+                    self.metrics.record_file('manifest', file_type, source_file, seconds, bytes_read=size)
+                    if previous_fingerprints.get(relative) == fingerprint and destination.exists():
+                        unchanged.add(relative)
+            logger.info(f"Mode incrémental: {len(unchanged)}/{len(fingerprints)} fichiers inchangés")
+
+        if map_owners and unchanged:
+            assets = [
+                (source_file, destination) for source_file, destination in assets
+                if not (map_owners.get(os.path.normpath(source_file)) in unchanged and destination.exists())
+            ]
 
-    def resolve_conflicts(self, main_project_path: Path, demo_project_path: Path, output_path: Path) -> Dict:
-        """Résout les conflits entre deux projets"""
+        with self._phase('copy'):
+            results = run_threaded(self._copy_task, [(source_file, destination, incremental)
+                                                     for source_file, destination in assets], self.io_threads)
+            for (source_file, destination), (copied, error, seconds) in zip(assets, results):
+                if error is not None:
+                    logger.error(f"Erreur lors de la copie de {source_file}: {error}")
+                elif copied:
+                    self.metrics.record_file('copy', 'asset', source_file, seconds)
+                    changed_files.append(destination.relative_to(output_path).as_posix())
+
+        with self._phase('rewrite'):
+            # L'index permet d'ignorer les fichiers sans sélecteur en conflit et
+            # de limiter la réécriture CSS aux spans relevés
+            tasks = []
+            passthrough = []
+            for file_type, source_file, destination in text_tasks:
+                relative = destination.relative_to(output_path).as_posix()
+                if relative in unchanged:
+                    continue
+
+                offsets = None
+                if index is not None and source_file in index:
+                    conflicting = index.selectors_in(source_file) & mapping.keys()
+                    if not conflicting:
+                        passthrough.append((file_type, source_file, destination))
+                        continue
+                    # Un gros fichier CSS est réécrit en flux, sans offsets
+                    if file_type == 'css' and _file_size(source_file) < self.css_stream_threshold:
+                        offsets = index.offsets_in(source_file, conflicting)
+
+                tasks.append((file_type, source_file, destination, offsets))
+
+            results = run_threaded(self._copy_task, [(source_file, destination, False)
+                                                     for _, source_file, destination in passthrough],
+                                   self.io_threads)
+            for (file_type, source_file, destination), (_, error, seconds) in zip(passthrough, results):
+                relative = destination.relative_to(output_path).as_posix()
+                if error is not None:
+                    logger.error(f"Erreur lors de la copie de {source_file}: {error}")
+                    fingerprints.pop(relative, None)
+                    continue
+                self.metrics.record_file('copy', file_type, source_file, seconds)
+                changed_files.append(relative)
+                logger.debug(f"Aucun conflit dans {source_file}, copié tel quel")
+
+            if self.jobs > 1 and len(tasks) > 1:
+                results = run_parallel(_rewrite_file_worker, tasks, self.jobs,
+                                       _init_rewrite_worker,
+                                       (mapping, self.html_backend, self.css_stream_threshold, self.splice,
+                                        self.link_assets))
+            else:
+                results = run_threaded(lambda task: self._rewrite_task(replacer, task), tasks, self.io_threads)
+
+            # Résultats consommés dans l'ordre des fichiers pour des logs déterministes
+            for (file_type, source_file, destination, _), (edits, error, seconds) in zip(tasks, results):
+                relative = destination.relative_to(output_path).as_posix()
+                self.metrics.record_file(
+                    'rewrite', file_type, source_file, seconds,
+                    bytes_read=_file_size(source_file),
+                    bytes_written=_file_size(destination) if error is None else 0
+                )
+                if error is not None:
+                    logger.error(f"Erreur lors de la modification de {destination}: {error} "
+                                 f"(source reproduite telle quelle)")
+                    # Sans empreinte, le fichier sera retraité à la prochaine exécution
+                    fingerprints.pop(relative, None)
+                    changed_files.append(relative)
+                    continue
+                files_processed += 1
+                changed_files.append(relative)
+                if edits:
+                    edit_list[relative] = edits
+                logger.debug(f"Modifié {destination}")
+
+            # Libérer les documents non réutilisés
+            self.extractor.html_documents.clear()
+
+        # Hors mode incrémental, les empreintes précédentes ne correspondent
+        # plus à la sortie : seule la liste des fichiers est conservée
+        OutputManifest.save(manifest_file, fingerprints, planned)
+
+        if self.splice:
+            if incremental:
+                # Les éditions des fichiers non réécrits restent valables
+                try:
+                    with open(edit_list_file, 'r', encoding='utf-8') as f:
+                        previous_edits = json.load(f).get('files', {})
+                except (OSError, ValueError, AttributeError):
+                    previous_edits = {}
+                for relative in unchanged:
+                    if relative in previous_edits:
+                        edit_list[relative] = previous_edits[relative]
+            with open(edit_list_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'offsets': 'bytes', 'files': dict(sorted(edit_list.items()))},
+                          f, ensure_ascii=False)
+            logger.info(f"Éditions de {len(edit_list)} fichiers sauvegardées dans {edit_list_file}")
+        elif edit_list_file.exists():
+            edit_list_file.unlink()
+
+        return files_processed, changed_files, deleted_files
+
+    def resolve_conflicts(self, main_project_path: Path, demo_project_path: Path, output_path: Path,
+                          incremental: bool = False, previous_mapping_path: Optional[Path] = None) -> Dict:
+        """Résout les conflits entre deux projets
+
+        En mode incrémental, les noms du selector_mapping.json précédent sont
+        conservés et seuls les fichiers dont la source ou les entrées du
+        mapping qui les concernent ont changé sont copiés et réécrits.
+        """
         logger.info("Début de la résolution des conflits CSS")
+        self.metrics.reset()
 
         # 1. Collecter les fichiers
-        main_files = self.file_collector.collect_project_files(main_project_path)
-        demo_files = self.file_collector.collect_project_files(demo_project_path)
+        with self._phase('collection'):
+            main_files = self.file_collector.collect_project_files(main_project_path, output_path)
+            demo_files = self.file_collector.collect_project_files(demo_project_path, output_path)
 
         # 2. Extraire les sélecteurs
-        logger.info("Extraction des sélecteurs du projet principal...")
-        main_selectors = self.extractor.extract_all_selectors(main_files)
-        logger.info(f"Trouvé {len(main_selectors)} sélecteurs dans le projet principal")
+        with self._phase('extraction'):
+            logger.info("Extraction des sélecteurs du projet principal...")
+            index = SelectorIndex()
+            table = SelectorTable()
+            # Tous les noms préfixés des deux projets, y compris hors des
+            # sélecteurs extraits : aucun nom généré ne doit les reprendre
+            raw_names: Set[str] = set()
+            main_ids = self.extractor.extract_selector_ids(
+                main_files, table, jobs=self.jobs,
+                index=index if self.index_file or self.keep_index else None, reserved_names=raw_names
+            )
+            logger.info(f"Trouvé {len(main_ids)} sélecteurs dans le projet principal")
+
+            logger.info("Extraction des sélecteurs de la démo...")
+            # Seuls les sélecteurs du projet principal peuvent être en conflit :
+            # l'index complet n'est construit que s'il est demandé
+            full_index = bool(self.index_file or self.keep_index)
+            demo_ids = self.extractor.extract_selector_ids(
+                demo_files, table, keep_documents=self.jobs <= 1, jobs=self.jobs, index=index,
+                locate=None if full_index else table.selectors(main_ids), reserved_names=raw_names
+            )
+            logger.info(f"Trouvé {len(demo_ids)} sélecteurs dans la démo")
+        self.index = index
 
-        logger.info("Extraction des sélecteurs de la démo...")
-        demo_selectors = self.extractor.extract_all_selectors(demo_files)
-        logger.info(f"Trouvé {len(demo_selectors)} sélecteurs dans la démo")
+        if self.index_file:
+            index.save(self.index_file)
+            logger.info(f"Index des sélecteurs sauvegardé dans {self.index_file}")
 
         # 3. Trouver les sélecteurs communs
-        common_selectors = main_selectors & demo_selectors
+        common_selectors = table.selectors(main_ids & demo_ids)
         logger.info(f"Trouvé {len(common_selectors)} sélecteurs communs")
 
         if not common_selectors:
             logger.info("Aucun conflit détecté, aucune modification nécessaire")
+            self.extractor.html_documents.clear()
             return {
                 'status': 'no_conflicts',
                 'common_selectors': [],
@@ -417,61 +2753,40 @@ class ConflictResolver:
 
         # 4. Générer les mappings UUID
         logger.info("Génération des mappings UUID...")
-        mapping = UUIDGenerator.generate_uuid_mapping(common_selectors)
+        mapping_file = output_path / 'selector_mapping.json'
+        previous_mapping = {}
+        with self._phase('mapping'):
+            if incremental:
+                previous_mapping_file = previous_mapping_path or mapping_file
+                if previous_mapping_file.exists():
+                    previous_mapping = UUIDGenerator.load_mapping(previous_mapping_file)
+                    logger.info(f"Mapping précédent chargé: {len(previous_mapping)} sélecteurs")
+            # Les nouveaux noms ne doivent reprendre aucun nom des deux projets
+            mapping = UUIDGenerator.generate_uuid_mapping(
+                common_selectors, previous_mapping, reserved_names=raw_names.union(table.names),
+                seed=self._seed_for(demo_project_path), minify=self.minify_names,
+                frequencies={selector: index.occurrence_count(selector) for selector in common_selectors}
+            )
 
         # 5. Créer le répertoire de sortie
         output_path.mkdir(parents=True, exist_ok=True)
 
-        # 6. Copier et modifier les fichiers de la démo
-        logger.info("Copie et modification des fichiers de la démo...")
-        replacer = FileReplacer(mapping)
-        files_processed = 0
-
-        # Copier d'abord tous les fichiers
-        shutil.copytree(demo_project_path, output_path, dirs_exist_ok=True)
-
-        # Puis modifier les fichiers copiés
-        output_demo_files = self.file_collector.collect_project_files(output_path)
-
-        # CSS files
-        for css_file in output_demo_files.css_files:
-            try:
-                content = css_file.read_text(encoding='utf-8')
-                modified_content = replacer.replace_in_css(content)
-                css_file.write_text(modified_content, encoding='utf-8')
-                files_processed += 1
-                logger.debug(f"Modifié {css_file}")
-            except Exception as e:
-                logger.error(f"Erreur lors de la modification de {css_file}: {e}")
-
-        # HTML files
-        for html_file in output_demo_files.html_files:
-            try:
-                content = html_file.read_text(encoding='utf-8')
-                modified_content = replacer.replace_in_html(content)
-                html_file.write_text(modified_content, encoding='utf-8')
-                files_processed += 1
-                logger.debug(f"Modifié {html_file}")
-            except Exception as e:
-                logger.error(f"Erreur lors de la modification de {html_file}: {e}")
-
-        # JavaScript files
-        for js_file in output_demo_files.js_files:
-            try:
-                content = js_file.read_text(encoding='utf-8')
-                modified_content = replacer.replace_in_js(content)
-                js_file.write_text(modified_content, encoding='utf-8')
-                files_processed += 1
-                logger.debug(f"Modifié {js_file}")
-            except Exception as e:
-                logger.error(f"Erreur lors de la modification de {js_file}: {e}")
+        # 6. Écrire les fichiers de la démo : les fichiers texte passent
+        # directement par le remplaceur, les autres sont liés ou copiés
+        logger.info("Écriture des fichiers de la démo...")
+        files_processed, changed_files, deleted_files = self.write_outputs(
+            demo_project_path, output_path, mapping, index, incremental
+        )
 
         # 7. Sauvegarder le mapping
-        mapping_file = output_path / 'selector_mapping.json'
         mapping_dict = {
             original: asdict(selector_mapping) 
             for original, selector_mapping in mapping.items()
         }
+        previous_mapping_dict = {
+            original: asdict(selector_mapping)
+            for original, selector_mapping in previous_mapping.items()
+        }
 
         with open(mapping_file, 'w', encoding='utf-8') as f:
             json.dump(mapping_dict, f, indent=2, ensure_ascii=False)
@@ -479,16 +2794,1122 @@ class ConflictResolver:
         logger.info(f"Résolution terminée. {files_processed} fichiers modifiés.")
         logger.info(f"Mapping sauvegardé dans {mapping_file}")
 
-        return {
+        result = {
             'status': 'success',
             'common_selectors': list(common_selectors),
             'mapping': mapping_dict,
             'files_processed': files_processed,
+            'deleted_files': deleted_files,
             'output_path': str(output_path)
         }
 
-def main():
+        if incremental:
+            if mapping_dict != previous_mapping_dict:
+                changed_files.append(mapping_file.name)
+            result['changed_files'] = sorted(changed_files)
+            logger.info(f"Fichiers de sortie modifiés: {len(changed_files)}")
+            for changed_file in result['changed_files']:
+                logger.debug(f"Changé: {changed_file}")
+
+        return result
+
+    def analyze_conflicts(self, main_project_path: Path, demo_project_path: Path,
+                          max_conflicts: Optional[int] = None) -> Dict:
+        """Rapport des conflits entre deux projets, sans rien écrire
+
+        S'arrête après l'extraction : aucun mapping n'est généré et aucun
+        fichier n'est copié ni réécrit. Avec max_conflicts, l'extraction de la
+        démo s'arrête dès que ce nombre de sélecteurs communs est atteint.
+        Les occurrences des sélecteurs communs sont relevées pendant
+        l'extraction (puis dans les fichiers de la démo non lus après l'arrêt),
+        là où la réécriture les modifierait (voir SelectorLocator) ; ligne et
+        colonne du nom, à partir de 1.
+        """
+        logger.info("Analyse des conflits CSS (aucune écriture)")
+        self.metrics.reset()
+
+        with self._phase('collection'):
+            main_files = self.file_collector.collect_project_files(main_project_path)
+            demo_files = self.file_collector.collect_project_files(demo_project_path)
+
+        conflict_ids: Set[int] = set()
+        with self._phase('extraction'):
+            table = SelectorTable()
+            index = SelectorIndex()
+            main_ids = self.extractor.extract_selector_ids(main_files, table, jobs=self.jobs, index=index)
+
+            def stop(file_ids: Set[int]) -> bool:
+                conflict_ids.update(file_ids & main_ids)
+                return max_conflicts is not None and len(conflict_ids) >= max_conflicts
+
+            # Dans la démo, seuls les sélecteurs du projet principal sont relevés
+            self.extractor.extract_selector_ids(demo_files, table, jobs=self.jobs, index=index, stop=stop,
+                                                locate=table.selectors(main_ids))
+
+        common_selectors = sorted(table.selectors(conflict_ids))
+        threshold_reached = max_conflicts is not None and len(common_selectors) >= max_conflicts
+        logger.info(f"Trouvé {len(common_selectors)} sélecteurs communs"
+                    + (" (seuil atteint, analyse arrêtée)" if threshold_reached else ""))
+
+        locations: Dict[str, List[Dict]] = {selector: [] for selector in common_selectors}
+        with self._phase('location'):
+            if threshold_reached and common_selectors:
+                # Fichiers de la démo non lus après l'arrêt de l'extraction
+                unread = [task for task in demo_files.tasks() if task[1] not in index]
+                self.extractor._index_locations(unread, set(common_selectors), index, self.jobs)
+            projects = {
+                str(file_path): project
+                for project, project_files in (('main', main_files), ('demo', demo_files))
+                for _, file_path in project_files.tasks()
+            }
+            conflicts = set(common_selectors)
+            for file_id, file_path in enumerate(index.files):
+                selectors = index.file_selectors[file_id] & conflicts
+                if not selectors:
+                    continue
+                raw = Path(file_path).read_bytes()
+                line_starts = [0] + [match.end() for match in re.finditer(b'\n', raw)]
+                for selector in sorted(selectors):
+                    for offset in index.postings[selector][file_id]:
+                        line = bisect.bisect_right(line_starts, offset)
+                        column = len(raw[line_starts[line - 1]:offset].decode('utf-8', 'replace')) + 1
+                        locations[selector].append({
+                            'project': projects[file_path],
+                            'file': file_path,
+                            'line': line,
+                            'column': column,
+                            'offset': offset
+                        })
+
+        return {
+            'status': 'conflicts' if common_selectors else 'no_conflicts',
+            'main_project': str(main_project_path),
+            'demo_project': str(demo_project_path),
+            'max_conflicts': max_conflicts,
+            'threshold_reached': threshold_reached,
+            'conflict_count': len(common_selectors),
+            'conflicts': [
+                {'selector': selector, 'locations': locations[selector]}
+                for selector in common_selectors
+            ]
+        }
+
+    def resolve_projects(self, project_paths: List[Path], output_root: Path) -> Dict:
+        """Résout les conflits entre N projets en une seule exécution
+
+        Chaque projet est extrait une seule fois et seul son ensemble de
+        sélecteurs est conservé. Un sélecteur utilisé par plusieurs projets
+        garde son nom dans le premier projet qui l'utilise (dans l'ordre
+        donné) et reçoit un nom propre dans chacun des autres. Les projets
+        sont ensuite écrits un par un dans output_root/<nom du projet>, y
+        compris ceux sans renommage (fichiers liés ou copiés tels quels).
+        """
+        logger.info(f"Début de la résolution des conflits CSS entre {len(project_paths)} projets")
+        output_names = self._project_output_names(project_paths)
+
+        # 1. Extraire chaque projet une seule fois
+        table = SelectorTable()
+        project_selectors: List[Optional[Set[int]]] = []
+        owners: Dict[int, int] = {}
+        usage = Counter()
+        raw_names: Set[str] = set()
+        for position, project_path in enumerate(project_paths):
+            project_files = self.file_collector.collect_project_files(project_path, output_root)
+            selector_ids = self.extractor.extract_selector_ids(project_files, table, jobs=self.jobs,
+                                                               reserved_names=raw_names)
+            logger.info(f"Trouvé {len(selector_ids)} sélecteurs dans {project_path}")
+            project_selectors.append(selector_ids)
+            usage.update(selector_ids)
+            for selector_id in selector_ids:
+                owners.setdefault(selector_id, position)
+
+        collisions = {selector_id for selector_id, count in usage.items() if count > 1}
+        logger.info(f"Trouvé {len(collisions)} sélecteurs partagés entre projets")
+
+        # 2. Plan de renommage et réécriture, projet par projet. Les noms
+        # générés évitent tous les noms existants des projets
+        reserved_names: Set[str] = raw_names.union(table.names)
+        plan: Dict[str, Dict[str, str]] = {}
+        projects = []
+        for position, project_path in enumerate(project_paths):
+            selector_ids = project_selectors[position]
+            project_selectors[position] = None
+            conflicting = table.selectors(
+                selector_id for selector_id in selector_ids
+                if selector_id in collisions and owners[selector_id] != position
+            )
+
+            # Index limité aux sélecteurs renommés : fichiers ignorés, spans CSS
+            # et fréquences du mode minify. Sans renommage, tous les fichiers
+            # sont indexés sans occurrence et repris tels quels
+            index = SelectorIndex()
+            project_files = self.file_collector.collect_project_files(project_path, output_root)
+            if conflicting:
+                self.extractor._index_locations(project_files.tasks(), conflicting, index, self.jobs)
+            else:
+                for file_type, file_path in project_files.tasks():
+                    index.add_file(file_path, file_type, {})
+
+            mapping = UUIDGenerator.generate_uuid_mapping(
+                conflicting, reserved_names=reserved_names, seed=self._seed_for(project_path),
+                minify=self.minify_names,
+                frequencies={selector: index.occurrence_count(selector) for selector in conflicting}
+            )
+            project_output = output_root / output_names[position]
+
+            logger.info(f"{project_path}: {len(mapping)} sélecteurs renommés -> {project_output}")
+            files_processed, _, deleted_files = self.write_outputs(project_path, project_output, mapping,
+                                                                   index, exclude=output_root)
+
+            mapping_dict = {
+                original: asdict(selector_mapping)
+                for original, selector_mapping in mapping.items()
+            }
+            with open(project_output / 'selector_mapping.json', 'w', encoding='utf-8') as f:
+                json.dump(mapping_dict, f, indent=2, ensure_ascii=False)
+
+            plan[output_names[position]] = {
+                original: selector_mapping.uuid_name
+                for original, selector_mapping in mapping.items()
+            }
+            projects.append({
+                'project': str(project_path),
+                'output_path': str(project_output),
+                'renamed_selectors': len(mapping),
+                'files_processed': files_processed,
+                'deleted_files': deleted_files
+            })
+
+        output_root.mkdir(parents=True, exist_ok=True)
+        plan_file = output_root / 'rename_plan.json'
+        with open(plan_file, 'w', encoding='utf-8') as f:
+            json.dump(plan, f, indent=2, sort_keys=True, ensure_ascii=False)
+        logger.info(f"Plan de renommage sauvegardé dans {plan_file}")
+
+        return {
+            'status': 'success' if collisions else 'no_conflicts',
+            'collisions': sorted(table.selectors(collisions)),
+            'projects': projects,
+            'plan_path': str(plan_file)
+        }
+
+    @staticmethod
+    def _project_output_names(project_paths: List[Path]) -> List[str]:
+        """Nom de sortie unique pour chaque projet (nom du répertoire)"""
+        names = []
+        seen = Counter()
+        for project_path in project_paths:
+            name = project_path.resolve().name or 'project'
+            seen[name] += 1
+            names.append(name if seen[name] == 1 else f'{name}-{seen[name]}')
+        return names
+
+class WatchSession:
+    """Résolution continue pendant le développement
+
+    Les sélecteurs de chaque fichier des deux projets sont gardés en mémoire
+    avec un compteur par sélecteur. À chaque modification, seul le fichier
+    touché est réanalysé, l'ensemble des sélecteurs communs est mis à jour
+    incrémentalement et seules les sorties concernées sont réécrites. Les
+    changements sont détectés par scrutation des dates de modification.
+    """
+
+    def __init__(self, main_project_path: Path, demo_project_path: Path, output_path: Path,
+                 html_backend: str = 'html.parser', cache: Optional[ExtractionCache] = None,
+                 ignored: Optional[List[str]] = None, name_seed: Optional[str] = None,
+                 minify_names: bool = False, link_assets: bool = True,
+                 css_stream_threshold: int = CSS_STREAM_THRESHOLD):
+        self.main_project_path = main_project_path
+        self.demo_project_path = demo_project_path
+        self.output_path = output_path
+        self.html_backend = html_backend
+        self.name_seed = name_seed
+        self.minify_names = minify_names
+        self.link_assets = link_assets
+        self.css_stream_threshold = css_stream_threshold
+        self.extractor = SelectorExtractor(html_backend, cache, css_stream_threshold)
+        self.file_collector = FileCollector(ignored)
+        self.excluded = SelectorExtractor.EXCLUDED_SELECTORS
+        # Fichiers des répertoires ignorés : copiés tels quels, jamais analysés
+        self.ignored_files: Set[Path] = set()
+        # Noms préfixés relevés dans le contenu brut, jamais repris par un nom généré
+        self.raw_names: Set[str] = set()
+
+        # Index en mémoire : identifiants des sélecteurs par fichier et nombre
+        # de fichiers par sélecteur
+        self.table = SelectorTable()
+        self.file_selectors: Dict[Path, Set[int]] = {}
+        self.counts = {main_project_path: Counter(), demo_project_path: Counter()}
+        self.snapshots: Dict[Path, Dict[Path, Tuple[int, int]]] = {}
+        self.mapping: Dict[str, SelectorMapping] = {}
+
+    def _project_of(self, file_path: Path) -> Path:
+        for project_path in (self.demo_project_path, self.main_project_path):
+            if file_path.is_relative_to(project_path):
+                return project_path
+        raise ValueError(f"{file_path} n'appartient à aucun projet surveillé")
+
+    def _snapshot(self, project_path: Path) -> Dict[Path, Tuple[int, int]]:
+        """Relève (mtime, taille) de chaque fichier du projet"""
+        snapshot = {}
+        for root_path, files, ignored in self.file_collector.walk(project_path, self.output_path,
+                                                                  include_ignored=True):
+            for entry in files:
+                file_path = root_path / entry.name
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+                if ignored:
+                    self.ignored_files.add(file_path)
+        return snapshot
+
+    def _file_type(self, file_path: Path) -> Optional[str]:
+        if file_path in self.ignored_files:
+            return None
+        return FILE_TYPES.get(file_path.suffix)
+
+    def _index_file(self, file_path: Path):
+        """Met à jour l'index pour un fichier ajouté, modifié ou supprimé"""
+        counts = self.counts[self._project_of(file_path)]
+        counts.subtract(self.file_selectors.pop(file_path, set()))
+
+        file_type = self._file_type(file_path)
+        if file_type is None or not file_path.exists():
+            return
+
+        selectors, _, names, error, _ = self.extractor._extract_task((file_type, file_path), False,
+                                                                     scan_names=True)
+        if names is not None:
+            self.raw_names.update(names)
+        if error is not None:
+            logger.error(f"Erreur lors de la lecture de {file_path}: {error}")
+            return
+
+        selectors -= self.excluded
+        selector_ids = self.table.add_selectors(selectors)
+        self.file_selectors[file_path] = selector_ids
+        counts.update(selector_ids)
+
+    def _common_selectors(self) -> Set[str]:
+        main_counts = self.counts[self.main_project_path]
+        demo_counts = self.counts[self.demo_project_path]
+        return self.table.selectors(
+            selector_id for selector_id, count in demo_counts.items()
+            if count > 0 and main_counts[selector_id] > 0
+        )
+
+    def _emit(self, source_file: Path, replacer: FileReplacer):
+        """Écrit la sortie d'un fichier de la démo"""
+        destination = self.output_path / source_file.relative_to(self.demo_project_path)
+        if not source_file.exists():
+            if destination.exists():
+                destination.unlink()
+            return
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        file_type = self._file_type(source_file)
+        try:
+            if file_type is None:
+                link_or_copy(source_file, destination, self.link_assets)
+            else:
+                replacer.rewrite_file(source_file, destination, file_type)
+            logger.debug(f"Modifié {destination}")
+        except Exception as e:
+            logger.error(f"Erreur lors de la modification de {destination}: {e}")
+
+    def _save_mapping(self):
+        mapping_dict = {
+            original: asdict(selector_mapping)
+            for original, selector_mapping in self.mapping.items()
+        }
+        with open(self.output_path / 'selector_mapping.json', 'w', encoding='utf-8') as f:
+            json.dump(mapping_dict, f, indent=2, ensure_ascii=False)
+
+    def _update_mapping(self) -> Set[str]:
+        """Recalcule le mapping en conservant les noms ; retourne les sélecteurs changés"""
+        common_selectors = self._common_selectors()
+        frequencies = None
+        if self.minify_names:
+            # Fréquence approchée : nombre de fichiers utilisant le sélecteur
+            file_counts = self.counts[self.main_project_path] + self.counts[self.demo_project_path]
+            frequencies = {
+                selector: file_counts[self.table.find(selector)]
+                for selector in common_selectors
+            }
+        seed = self.name_seed if self.name_seed is not None else self.demo_project_path.resolve().name
+        new_mapping = UUIDGenerator.generate_uuid_mapping(
+            common_selectors, self.mapping, reserved_names=self.raw_names.union(self.table.names),
+            seed=seed, minify=self.minify_names, frequencies=frequencies
+        )
+        changed = set(new_mapping) ^ set(self.mapping)
+        self.mapping = new_mapping
+        return changed
+
+    def start(self):
+        """Indexation complète initiale et écriture de toute la sortie"""
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        mapping_file = self.output_path / 'selector_mapping.json'
+        if mapping_file.exists():
+            self.mapping = UUIDGenerator.load_mapping(mapping_file)
+
+        for project_path in (self.main_project_path, self.demo_project_path):
+            self.snapshots[project_path] = self._snapshot(project_path)
+            for file_path in self.snapshots[project_path]:
+                if self._file_type(file_path):
+                    self._index_file(file_path)
+
+        self._update_mapping()
+        replacer = FileReplacer(self.mapping, self.html_backend, self.css_stream_threshold,
+                                link_assets=self.link_assets)
+        for source_file in self.snapshots[self.demo_project_path]:
+            self._emit(source_file, replacer)
+        self._save_mapping()
+        if self.extractor.cache is not None:
+            self.extractor.cache.prune()
+        logger.info(f"Surveillance démarrée: {len(self.mapping)} sélecteurs communs")
+
+    def poll(self) -> List[Path]:
+        """Traite les changements depuis le dernier relevé ; retourne les sorties réécrites"""
+        touched = []
+        for project_path in (self.main_project_path, self.demo_project_path):
+            previous = self.snapshots[project_path]
+            current = self._snapshot(project_path)
+            touched.extend(
+                file_path for file_path in set(previous) | set(current)
+                if previous.get(file_path) != current.get(file_path)
+            )
+            self.snapshots[project_path] = current
+
+        if not touched:
+            return []
+
+        for file_path in touched:
+            if self._file_type(file_path):
+                self._index_file(file_path)
+
+        changed_selectors = self._update_mapping()
+
+        # Sorties concernées : fichiers de la démo modifiés, et ceux qui
+        # utilisent un sélecteur dont le statut de conflit a changé
+        affected = {
+            file_path for file_path in touched
+            if file_path.is_relative_to(self.demo_project_path)
+        }
+        if changed_selectors:
+            changed_ids = self.table.add_selectors(changed_selectors)
+            affected.update(
+                file_path for file_path, selector_ids in self.file_selectors.items()
+                if file_path.is_relative_to(self.demo_project_path) and selector_ids & changed_ids
+            )
+            self._save_mapping()
+
+        replacer = FileReplacer(self.mapping, self.html_backend, self.css_stream_threshold,
+                                link_assets=self.link_assets)
+        for source_file in sorted(affected):
+            self._emit(source_file, replacer)
+        return sorted(affected)
+
+    def run(self, interval: float = 0.05):
+        """Boucle de surveillance jusqu'à interruption (Ctrl+C)"""
+        self.start()
+        try:
+            while True:
+                time.sleep(interval)
+                start = time.perf_counter()
+                affected = self.poll()
+                if affected:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    logger.info(f"{len(affected)} sortie(s) mise(s) à jour en {elapsed:.1f} ms")
+        except KeyboardInterrupt:
+            logger.info("Surveillance arrêtée")
+
+class RPCError(Exception):
+    """Erreur JSON-RPC renvoyée au client"""
+
+    PARSE_ERROR = -32700
+    INVALID_REQUEST = -32600
+    METHOD_NOT_FOUND = -32601
+    INVALID_PARAMS = -32602
+    RESOLUTION_ERROR = -32000
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+class ResolverServer:
+    """Serveur résident JSON-RPC 2.0 (un objet JSON par ligne)
+
+    Les résolveurs et le cache d'extraction en mémoire restent chargés
+    d'une requête à l'autre : un fichier inchangé n'est plus analysé, et
+    l'index complet de la dernière résolution de chaque sortie reste
+    interrogeable par la méthode query. Les requêtes sont traitées une à
+    une, dans l'ordre de réception.
+
+    Méthodes : resolve, analyze, query, stats, shutdown.
+    """
+
+    def __init__(self, jobs: int = 1, io_threads: int = IO_THREADS,
+                 css_stream_threshold: int = CSS_STREAM_THRESHOLD,
+                 cache_entries: int = 100_000, ignored: Optional[List[str]] = None):
+        self.jobs = jobs
+        self.io_threads = io_threads
+        self.css_stream_threshold = css_stream_threshold
+        self.ignored = ignored
+        self.cache = MemoryExtractionCache(cache_entries)
+        # Un résolveur par backend HTML, réutilisé entre les requêtes
+        self.resolvers: Dict[str, ConflictResolver] = {}
+        # Index de la dernière résolution, par répertoire de sortie
+        self.indexes: Dict[str, SelectorIndex] = {}
+        self.requests = 0
+        self.started = time.time()
+        self.running = True
+        self.methods = {
+            'resolve': self.resolve,
+            'analyze': self.analyze,
+            'query': self.query,
+            'stats': self.stats,
+            'shutdown': self.shutdown,
+        }
+
+    def _resolver(self, html_backend: str) -> ConflictResolver:
+        resolver = self.resolvers.get(html_backend)
+        if resolver is None:
+            resolver = ConflictResolver(html_backend=html_backend, jobs=self.jobs, cache=self.cache,
+                                        css_stream_threshold=self.css_stream_threshold,
+                                        io_threads=self.io_threads, ignored=self.ignored)
+            resolver.keep_index = True
+            self.resolvers[html_backend] = resolver
+        return resolver
+
+    @staticmethod
+    def _path(params: Dict, name: str, required: bool = True) -> Optional[Path]:
+        value = params.get(name)
+        if value is None and not required:
+            return None
+        if not isinstance(value, str) or not value:
+            raise RPCError(RPCError.INVALID_PARAMS, f"Paramètre '{name}' manquant ou invalide")
+        return Path(value)
+
+    def resolve(self, params: Dict) -> Dict:
+        """Résout les conflits entre deux projets (mêmes options que la ligne de commande)"""
+        main_path = self._path(params, 'main_project')
+        demo_path = self._path(params, 'demo_project')
+        output_path = self._path(params, 'output')
+        for project_path in (main_path, demo_path):
+            if not project_path.exists():
+                raise RPCError(RPCError.INVALID_PARAMS, f"Le projet {project_path} n'existe pas")
+
+        html_backend = params.get('html_backend', 'html.parser')
+        if html_backend not in HTML_BACKENDS:
+            raise RPCError(RPCError.INVALID_PARAMS, f"Backend HTML inconnu: {html_backend}")
+
+        resolver = self._resolver(html_backend)
+        resolver.link_assets = not params.get('copy_assets', False)
+        resolver.index_file = self._path(params, 'index_file', required=False)
+        resolver.name_seed = params.get('name_seed')
+        resolver.minify_names = bool(params.get('minify_names', False))
+        resolver.splice = bool(params.get('splice', False))
+        try:
+            result = resolver.resolve_conflicts(
+                main_path, demo_path, output_path,
+                incremental=bool(params.get('incremental', False)),
+                previous_mapping_path=self._path(params, 'previous_mapping', required=False)
+            )
+        except Exception as e:
+            raise RPCError(RPCError.RESOLUTION_ERROR, f"Erreur lors de la résolution: {e}")
+
+        if resolver.index is not None:
+            self.indexes[str(output_path.resolve())] = resolver.index
+        result = dict(result, output_path=str(output_path))
+        result['metrics'] = resolver.metrics.to_dict()
+        return result
+
+    def analyze(self, params: Dict) -> Dict:
+        """Rapport des conflits sans réécriture (voir la commande report)"""
+        main_path = self._path(params, 'main_project')
+        demo_path = self._path(params, 'demo_project')
+        for project_path in (main_path, demo_path):
+            if not project_path.exists():
+                raise RPCError(RPCError.INVALID_PARAMS, f"Le projet {project_path} n'existe pas")
+
+        max_conflicts = params.get('max_conflicts')
+        if max_conflicts is not None and (not isinstance(max_conflicts, int) or max_conflicts < 1):
+            raise RPCError(RPCError.INVALID_PARAMS, "Paramètre 'max_conflicts' invalide")
+        html_backend = params.get('html_backend', 'html.parser')
+        if html_backend not in HTML_BACKENDS:
+            raise RPCError(RPCError.INVALID_PARAMS, f"Backend HTML inconnu: {html_backend}")
+
+        try:
+            report = self._resolver(html_backend).analyze_conflicts(main_path, demo_path, max_conflicts)
+        except Exception as e:
+            raise RPCError(RPCError.RESOLUTION_ERROR, f"Erreur lors de l'analyse: {e}")
+        return conflict_report_sarif(report) if params.get('format') == 'sarif' else report
+
+    def query(self, params: Dict) -> Dict:
+        """Fichiers et offsets des sélecteurs, d'après l'index en mémoire d'une sortie"""
+        output_path = self._path(params, 'output')
+        selectors = params.get('selectors')
+        if not isinstance(selectors, list) or not all(isinstance(selector, str) for selector in selectors):
+            raise RPCError(RPCError.INVALID_PARAMS, "Paramètre 'selectors' manquant ou invalide")
+        index = self.indexes.get(str(output_path.resolve()))
+        if index is None:
+            raise RPCError(RPCError.INVALID_PARAMS, f"Aucune résolution en mémoire pour {output_path}")
+        return {selector: index.locations(selector) for selector in selectors}
+
+    def stats(self, params: Dict) -> Dict:
+        """État du serveur et du cache en mémoire"""
+        return {
+            'requests': self.requests,
+            'uptime_seconds': time.time() - self.started,
+            'cache': {
+                'entries': len(self.cache.entries),
+                'max_entries': self.cache.max_entries,
+                'hits': self.cache.hits,
+                'misses': self.cache.misses
+            },
+            'indexed_outputs': sorted(self.indexes)
+        }
+
+    def shutdown(self, params: Dict) -> bool:
+        """Arrête le serveur après cette requête"""
+        self.running = False
+        return True
+
+    def handle(self, line: str) -> Optional[str]:
+        """Traite une ligne de requête ; None pour une notification (sans id),
+        même en erreur"""
+        request_id = None
+        notification = False
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                raise RPCError(RPCError.PARSE_ERROR, f"JSON invalide: {e}")
+            if not isinstance(request, dict) or request.get('jsonrpc') != '2.0' \
+                    or not isinstance(request.get('method'), str):
+                raise RPCError(RPCError.INVALID_REQUEST, "Requête JSON-RPC 2.0 invalide")
+
+            request_id = request.get('id')
+            notification = 'id' not in request
+            method = self.methods.get(request['method'])
+            if method is None:
+                raise RPCError(RPCError.METHOD_NOT_FOUND, f"Méthode inconnue: {request['method']}")
+            params = request.get('params', {})
+            if not isinstance(params, dict):
+                raise RPCError(RPCError.INVALID_PARAMS, "Les paramètres doivent être nommés")
+
+            self.requests += 1
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': method(params)}
+        except RPCError as e:
+            logger.warning(f"Requête refusée: {e.message}")
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': e.message}}
+        if notification:
+            return None
+        return json.dumps(response, ensure_ascii=False)
+
+    def serve_stream(self, reader, writer):
+        """Traite les requêtes d'un flux texte jusqu'à sa fin ou à shutdown"""
+        for line in reader:
+            if not line.strip():
+                continue
+            response = self.handle(line)
+            if response is not None:
+                writer.write(response + '\n')
+                writer.flush()
+            if not self.running:
+                break
+
+    def serve_unix(self, socket_path: Path):
+        """Écoute sur un socket Unix ; une connexion à la fois"""
+        import socketserver
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                reader = io.TextIOWrapper(self.rfile, encoding='utf-8')
+                writer = io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+                server.serve_stream(reader, writer)
+
+        if socket_path.exists():
+            socket_path.unlink()
+        with socketserver.UnixStreamServer(str(socket_path), Handler) as unix_server:
+            logger.info(f"Serveur en écoute sur {socket_path}")
+            try:
+                while self.running:
+                    unix_server.handle_request()
+            finally:
+                socket_path.unlink(missing_ok=True)
+
+class SyntheticProjectGenerator:
+    """Générateur de projets principal/démo synthétiques pour les benchmarks
+
+    Chaque projet contient `files` fichiers CSS, HTML et JS utilisant
+    `selectors` sélecteurs, dont une fraction `overlap` est partagée entre
+    les deux projets. Le contenu est indenté ou minifié.
+    """
+
+    def __init__(self, files: int = 10, selectors: int = 500, overlap: float = 0.3,
+                 minified: bool = False, seed: int = 0):
+        self.files = files
+        self.selectors = selectors
+        self.overlap = overlap
+        self.minified = minified
+        self.seed = seed
+
+    def config(self) -> Dict:
+        return {
+            'files_per_type': self.files,
+            'selectors': self.selectors,
+            'overlap': self.overlap,
+            'minified': self.minified,
+            'seed': self.seed
+        }
+
+    def generate(self, root: Path) -> Tuple[Path, Path]:
+        """Génère root/main et root/demo ; retourne leurs chemins"""
+        rng = random.Random(self.seed)
+        shared_count = int(self.selectors * self.overlap)
+        shared = [self._selector(rng, f'shared-{i}') for i in range(shared_count)]
+
+        projects = []
+        for project in ('main', 'demo'):
+            names = shared + [
+                self._selector(rng, f'{project}-{i}')
+                for i in range(self.selectors - shared_count)
+            ]
+            rng.shuffle(names)
+            project_path = root / project
+            self._write_project(project_path, names, rng)
+            projects.append(project_path)
+
+        return projects[0], projects[1]
+
+    @staticmethod
+    def _selector(rng: random.Random, name: str) -> str:
+        return ('#' if rng.random() < 0.1 else '.') + name
+
+    def _chunks(self, names: List[str]) -> List[List[str]]:
+        size = max(1, -(-len(names) // self.files))
+        return [names[i:i + size] for i in range(0, len(names), size)] or [[]]
+
+    def _write_project(self, project_path: Path, names: List[str], rng: random.Random):
+        project_path.mkdir(parents=True, exist_ok=True)
+        for number, chunk in enumerate(self._chunks(names)):
+            (project_path / f'styles-{number}.css').write_text(self._css(chunk, rng), encoding='utf-8')
+            (project_path / f'page-{number}.html').write_text(self._html(chunk, rng), encoding='utf-8')
+            (project_path / f'script-{number}.js').write_text(self._js(chunk, rng), encoding='utf-8')
+
+    def _css(self, names: List[str], rng: random.Random) -> str:
+        rules = []
+        for name in names:
+            other = rng.choice(names)
+            selector = f'{name} {other}:hover,\n{name} > .child' if not self.minified else f'{name} {other}:hover,{name}>.child'
+            declarations = [f'color: #{rng.randrange(0x1000000):06x}', f'margin: {rng.randrange(40)}px auto']
+            if self.minified:
+                rules.append(f"{selector}{{{';'.join(d.replace(': ', ':') for d in declarations)}}}")
+            else:
+                body = ''.join(f'    {declaration};\n' for declaration in declarations)
+                rules.append(f'{selector} {{\n{body}}}\n')
+        return ('' if self.minified else '\n').join(rules)
+
+    def _html(self, names: List[str], rng: random.Random) -> str:
+        newline = '' if self.minified else '\n'
+        elements = []
+        for name in names:
+            attribute = 'id' if name.startswith('#') else 'class'
+            extra = f' {rng.choice(names)[1:]}' if attribute == 'class' else ''
+            elements.append(
+                f'<div {attribute}="{name[1:]}{extra}"><span style="padding: 2px">'
+                f'{name[1:]}</span></div>'
+            )
+        style = f'<style>{self._css(names[:5], rng)}</style>'
+        return (f'<!DOCTYPE html>{newline}<html>{newline}<head>{style}</head>{newline}<body>{newline}'
+                + newline.join(elements) + f'{newline}</body>{newline}</html>{newline}')
+
+    def _js(self, names: List[str], rng: random.Random) -> str:
+        newline = '' if self.minified else '\n'
+        statements = []
+        for i, name in enumerate(names):
+            if name.startswith('#'):
+                statements.append(f"var e{i}=document.getElementById('{name[1:]}');")
+            elif i % 2:
+                statements.append(f"document.querySelectorAll('{name} .child').forEach(function(e){{e.classList.add('{name[1:]}')}});")
+            else:
+                statements.append(f"var v{i}=function(a){{return a*{rng.randrange(100)}}};")
+        return newline.join(statements) + newline
+
+def run_benchmark(generator: SyntheticProjectGenerator, html_backend: str = 'html.parser',
+                  jobs: int = 1, repeat: int = 1, work_dir: Optional[Path] = None) -> Dict:
+    """Génère les projets synthétiques et mesure chaque phase de resolve_conflicts"""
+    import platform
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        root = Path(tmp)
+        start = time.perf_counter()
+        main_path, demo_path = generator.generate(root)
+        generation_seconds = time.perf_counter() - start
+
+        input_bytes = sum(path.stat().st_size for path in root.rglob('*') if path.is_file())
+
+        runs = []
+        result = {}
+        for run in range(repeat):
+            resolver = ConflictResolver(html_backend=html_backend, jobs=jobs)
+            start = time.perf_counter()
+            result = resolver.resolve_conflicts(main_path, demo_path, root / f'output-{run}')
+            total = time.perf_counter() - start
+            runs.append({'phases': dict(resolver.timings), 'total_seconds': total})
+
+    phases = sorted({phase for run in runs for phase in run['phases']})
+    return {
+        'config': dict(generator.config(), html_backend=html_backend, jobs=jobs, repeat=repeat),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'parser_version': PARSER_VERSION
+        },
+        'input_bytes': input_bytes,
+        'generation_seconds': generation_seconds,
+        'common_selectors': len(result.get('common_selectors', [])),
+        'files_processed': result.get('files_processed', 0),
+        'runs': runs,
+        'best': {
+            'phases': {
+                phase: min(run['phases'].get(phase, 0.0) for run in runs)
+                for phase in phases
+            },
+            'total_seconds': min(run['total_seconds'] for run in runs)
+        }
+    }
+
+def benchmark_main(argv: List[str]) -> int:
+    """Commande benchmark : mesure sur des projets synthétiques, sortie JSON"""
+    parser = argparse.ArgumentParser(
+        prog='css_conflict_resolver.py benchmark',
+        description='Mesure chaque phase de la résolution sur des projets synthétiques'
+    )
+    parser.add_argument('--files', type=int, default=10, help='Fichiers de chaque type par projet (défaut: 10)')
+    parser.add_argument('--selectors', type=int, default=500, help='Sélecteurs par projet (défaut: 500)')
+    parser.add_argument('--overlap', type=float, default=0.3,
+                        help='Fraction de sélecteurs partagés entre les projets (défaut: 0.3)')
+    parser.add_argument('--minified', action='store_true', help='Génère du contenu minifié')
+    parser.add_argument('--seed', type=int, default=0, help='Graine du générateur (défaut: 0)')
+    parser.add_argument('--repeat', type=int, default=3, help='Nombre d\'exécutions mesurées (défaut: 3)')
+    parser.add_argument('--html-backend', choices=HTML_BACKENDS, default='html.parser',
+                        help='Backend HTML : html.parser, lxml ou stream')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Nombre de processus (0 = nombre de CPU)')
+    parser.add_argument('--work-dir', type=Path, help='Répertoire des fichiers temporaires')
+    parser.add_argument('--output-json', type=Path, help='Écrit le résultat JSON dans ce fichier')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
+
+    args = parser.parse_args(argv)
+
+    # Les logs de résolution noieraient la sortie du benchmark
+    logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+    generator = SyntheticProjectGenerator(args.files, args.selectors, args.overlap, args.minified, args.seed)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    report = run_benchmark(generator, args.html_backend, jobs, max(1, args.repeat), args.work_dir)
+
+    output = json.dumps(report, indent=2)
+    if args.output_json:
+        args.output_json.write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+    return 0
+
+def query_main(argv: List[str]) -> int:
+    """Commande query : interroge un index écrit avec --index-file"""
+    parser = argparse.ArgumentParser(
+        prog='css_conflict_resolver.py query',
+        description='Affiche les fichiers et offsets où apparaissent des sélecteurs'
+    )
+    parser.add_argument('index_file', type=Path, help='Index écrit avec --index-file')
+    parser.add_argument('selectors', nargs='+', help='Sélecteurs à rechercher (ex: .button #main)')
+    parser.add_argument('--json', action='store_true', help='Sortie JSON')
+
+    args = parser.parse_args(argv)
+
+    try:
+        index = SelectorIndex.load(args.index_file)
+    except (OSError, ValueError) as e:
+        logger.error(f"Impossible de charger l'index {args.index_file}: {e}")
+        return 1
+
+    results = {selector: index.locations(selector) for selector in args.selectors}
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return 0
+
+    for selector, locations in results.items():
+        total = sum(len(offsets) for offsets in locations.values())
+        print(f"{selector}: {total} occurrence(s) dans {len(locations)} fichier(s)")
+        for file_path, offsets in locations.items():
+            print(f"  {file_path}: {', '.join(str(offset) for offset in offsets)}")
+    return 0
+
+def conflict_report_sarif(report: Dict) -> Dict:
+    """Convertit un rapport de analyze_conflicts au format SARIF 2.1.0
+
+    Un résultat par sélecteur commun : ses occurrences dans la démo sont
+    les emplacements du résultat, celles du projet principal des
+    emplacements liés. Les chemins sont relatifs à la racine de leur projet,
+    désignée par uriBaseId (DEMO ou MAIN).
+    """
+    roots = {'demo': report['demo_project'], 'main': report['main_project']}
+
+    def location(occurrence: Dict) -> Dict:
+        relative = os.path.relpath(occurrence['file'], roots[occurrence['project']])
+        return {
+            'physicalLocation': {
+                'artifactLocation': {
+                    'uri': quote(Path(relative).as_posix()),
+                    'uriBaseId': occurrence['project'].upper()
+                },
+                'region': {
+                    'startLine': occurrence['line'],
+                    'startColumn': occurrence['column'],
+                    'byteOffset': occurrence['offset']
+                }
+            }
+        }
+
+    results = []
+    for conflict in report['conflicts']:
+        selector = conflict['selector']
+        demo = [location(occurrence) for occurrence in conflict['locations'] if occurrence['project'] == 'demo']
+        main = [location(occurrence) for occurrence in conflict['locations'] if occurrence['project'] == 'main']
+        results.append({
+            'ruleId': 'css-selector-conflict',
+            'level': 'error',
+            'message': {'text': f"Le sélecteur {selector} est défini dans les deux projets"},
+            'locations': demo,
+            'relatedLocations': main,
+            'properties': {'selector': selector}
+        })
+
+    return {
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'version': '2.1.0',
+        'runs': [{
+            'tool': {
+                'driver': {
+                    'name': 'css-conflict-resolver',
+                    'version': PARSER_VERSION,
+                    'rules': [{
+                        'id': 'css-selector-conflict',
+                        'shortDescription': {'text': 'Sélecteur CSS présent dans les deux projets'}
+                    }]
+                }
+            },
+            'originalUriBaseIds': {
+                project.upper(): {'uri': Path(root).resolve().as_uri() + '/'}
+                for project, root in roots.items()
+            },
+            'columnKind': 'unicodeCodePoints',
+            'results': results,
+            'properties': {
+                'thresholdReached': report['threshold_reached'],
+                'conflictCount': report['conflict_count']
+            }
+        }]
+    }
+
+def report_main(argv: List[str]) -> int:
+    """Commande report : analyse des conflits sans réécriture (JSON ou SARIF)
+
+    Code de sortie : 0 sans conflit (ou sous le seuil), 2 si des conflits
+    sont trouvés (ou si le seuil est atteint), 1 en cas d'erreur.
+    """
+    parser = argparse.ArgumentParser(
+        prog='css_conflict_resolver.py report',
+        description='Liste les sélecteurs en conflit et leurs emplacements, sans rien écrire'
+    )
+    parser.add_argument('main_project', type=Path, help='Chemin vers le projet principal')
+    parser.add_argument('demo_project', type=Path, help='Chemin vers le projet démo')
+    parser.add_argument('--format', choices=('json', 'sarif'), default='json', help='Format du rapport (défaut: json)')
+    parser.add_argument('--output-file', type=Path, help='Écrit le rapport dans ce fichier (défaut: sortie standard)')
+    parser.add_argument('--max-conflicts', type=int,
+                        help='Arrête l\'analyse dès que ce nombre de conflits est atteint ; '
+                             'seul ce seuil fait alors échouer la commande')
+    parser.add_argument('--html-backend', choices=HTML_BACKENDS, default='html.parser',
+                        help='Backend HTML : html.parser, lxml ou stream')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Nombre de processus pour l\'extraction (0 = nombre de CPU)')
+    parser.add_argument('--cache-dir', type=Path, help='Répertoire du cache d\'extraction')
+    parser.add_argument('--cache-max-size', type=int, default=256,
+                        help='Taille maximale du cache d\'extraction en Mo (défaut: 256)')
+    parser.add_argument('--io-threads', type=int, default=IO_THREADS,
+                        help=f'Threads de lecture en mode mono-processus (défaut: {IO_THREADS})')
+    parser.add_argument('--ignore', action='append', default=[], metavar='MOTIF',
+                        help='Répertoires à ne pas analyser, en plus de '
+                             + ', '.join(FileCollector.IGNORED_DIRECTORIES) + ' (motif fnmatch, répétable)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
+
+    args = parser.parse_args(argv)
+
+    # Le rapport est la seule sortie attendue
+    logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+    if args.max_conflicts is not None and args.max_conflicts < 1:
+        parser.error('--max-conflicts doit être au moins 1')
+
+    for project_path in (args.main_project, args.demo_project):
+        if not project_path.exists():
+            logger.error(f"Le projet {project_path} n'existe pas")
+            return 1
+
+    cache = None
+    if args.cache_dir:
+        cache = ExtractionCache(args.cache_dir, args.cache_max_size * 1024 * 1024)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    resolver = ConflictResolver(html_backend=args.html_backend, jobs=jobs, cache=cache,
+                                io_threads=args.io_threads,
+                                ignored=list(FileCollector.IGNORED_DIRECTORIES) + args.ignore)
+    try:
+        report = resolver.analyze_conflicts(args.main_project, args.demo_project, args.max_conflicts)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'analyse: {e}")
+        return 1
+
+    document = conflict_report_sarif(report) if args.format == 'sarif' else report
+    output = json.dumps(document, indent=2, ensure_ascii=False)
+    if args.output_file:
+        args.output_file.write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+    if args.max_conflicts is not None:
+        return 2 if report['threshold_reached'] else 0
+    return 2 if report['conflict_count'] else 0
+
+def multi_main(argv: List[str]) -> int:
+    """Commande multi : résolution entre N projets en une seule exécution"""
+    parser = argparse.ArgumentParser(
+        prog='css_conflict_resolver.py multi',
+        description='Résout les conflits CSS entre plusieurs projets web'
+    )
+    parser.add_argument('output', type=Path, help='Répertoire de sortie (un sous-répertoire par projet)')
+    parser.add_argument('projects', type=Path, nargs='+',
+                        help='Projets, par ordre de priorité (le premier garde tous ses noms)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
+    parser.add_argument('--html-backend', choices=HTML_BACKENDS, default='html.parser',
+                        help='Backend HTML : html.parser, lxml ou stream')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Nombre de processus pour l\'extraction et la réécriture (0 = nombre de CPU)')
+    parser.add_argument('--cache-dir', type=Path, help='Répertoire du cache d\'extraction')
+    parser.add_argument('--cache-max-size', type=int, default=256,
+                        help='Taille maximale du cache d\'extraction en Mo (défaut: 256)')
+    parser.add_argument('--css-stream-threshold', type=int, default=CSS_STREAM_THRESHOLD // (1024 * 1024),
+                        help='Taille en Mo à partir de laquelle un fichier CSS est traité en flux (défaut: 32)')
+    parser.add_argument('--name-seed',
+                        help='Graine des noms générés (défaut: nom du répertoire du projet renommé)')
+    parser.add_argument('--minify-names', action='store_true',
+                        help='Attribue les noms les plus courts aux sélecteurs les plus fréquents')
+    parser.add_argument('--io-threads', type=int, default=IO_THREADS,
+                        help=f'Threads de lecture, copie et écriture en mode mono-processus (défaut: {IO_THREADS})')
+    parser.add_argument('--ignore', action='append', default=[], metavar='MOTIF',
+                        help='Répertoires à ne pas analyser, en plus de '
+                             + ', '.join(FileCollector.IGNORED_DIRECTORIES) + ' (motif fnmatch, répétable)')
+    parser.add_argument('--splice', action='store_true',
+                        help='Réécrit par éditions ponctuelles (octets, source maps et liste des éditions)')
+
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    for project_path in args.projects:
+        if not project_path.exists():
+            logger.error(f"Le projet {project_path} n'existe pas")
+            return 1
+
+    cache = None
+    if args.cache_dir:
+        cache = ExtractionCache(args.cache_dir, args.cache_max_size * 1024 * 1024)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    resolver = ConflictResolver(html_backend=args.html_backend, jobs=jobs, cache=cache,
+                                css_stream_threshold=args.css_stream_threshold * 1024 * 1024,
+                                name_seed=args.name_seed, minify_names=args.minify_names,
+                                io_threads=args.io_threads,
+                                ignored=list(FileCollector.IGNORED_DIRECTORIES) + args.ignore,
+                                splice=args.splice)
+    try:
+        result = resolver.resolve_projects(args.projects, args.output)
+    except Exception as e:
+        logger.error(f"Erreur lors de la résolution: {e}")
+        return 1
+
+    logger.info(f"Sélecteurs partagés: {len(result['collisions'])}")
+    for project in result['projects']:
+        logger.info(f"{project['project']}: {project['renamed_selectors']} renommés, "
+                    f"{project['files_processed']} fichiers modifiés")
+    return 0
+
+def serve_main(argv: List[str]) -> int:
+    """Commande serve : serveur résident JSON-RPC sur stdin/stdout ou socket Unix"""
+    parser = argparse.ArgumentParser(
+        prog='css_conflict_resolver.py serve',
+        description='Garde parsers, cache d\'extraction et index en mémoire entre les requêtes JSON-RPC'
+    )
+    parser.add_argument('--socket', type=Path, help='Socket Unix d\'écoute (défaut: stdin/stdout)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Nombre de processus pour l\'extraction et la réécriture (0 = nombre de CPU)')
+    parser.add_argument('--io-threads', type=int, default=IO_THREADS,
+                        help=f'Threads de lecture, copie et écriture en mode mono-processus (défaut: {IO_THREADS})')
+    parser.add_argument('--css-stream-threshold', type=int, default=CSS_STREAM_THRESHOLD // (1024 * 1024),
+                        help='Taille en Mo à partir de laquelle un fichier CSS est traité en flux (défaut: 32)')
+    parser.add_argument('--cache-entries', type=int, default=100_000,
+                        help='Nombre maximal de fichiers dans le cache en mémoire (défaut: 100000)')
+    parser.add_argument('--ignore', action='append', default=[], metavar='MOTIF',
+                        help='Répertoires à ne pas analyser, en plus de '
+                             + ', '.join(FileCollector.IGNORED_DIRECTORIES) + ' (motif fnmatch, répétable)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
+
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    server = ResolverServer(jobs=jobs, io_threads=args.io_threads,
+                            css_stream_threshold=args.css_stream_threshold * 1024 * 1024,
+                            cache_entries=args.cache_entries,
+                            ignored=list(FileCollector.IGNORED_DIRECTORIES) + args.ignore)
+    try:
+        if args.socket:
+            server.serve_unix(args.socket)
+        else:
+            server.serve_stream(sys.stdin, sys.stdout)
+    except KeyboardInterrupt:
+        logger.info("Serveur arrêté")
+    return 0
+
+def main(argv: Optional[List[str]] = None):
     """Point d'entrée principal du script"""
+    if argv is None:
+        argv = sys.argv[1:]
+    configure_logging()
+    if argv and argv[0] == 'report':
+        return report_main(argv[1:])
+    if argv and argv[0] == 'serve':
+        return serve_main(argv[1:])
+    if argv and argv[0] == 'query':
+        return query_main(argv[1:])
+    if argv and argv[0] == 'multi':
+        return multi_main(argv[1:])
+    if argv and argv[0] == 'benchmark':
+        return benchmark_main(argv[1:])
+
     parser = argparse.ArgumentParser(
         description='Résout les conflits CSS entre deux projets web'
     )
@@ -496,12 +3917,61 @@ def main():
     parser.add_argument('demo_project', type=Path, help='Chemin vers le projet démo')
     parser.add_argument('output', type=Path, help='Chemin de sortie pour la démo modifiée')
     parser.add_argument('--verbose', '-v', action='store_true', help='Mode verbose')
-
-    args = parser.parse_args()
+    parser.add_argument('--html-backend', choices=HTML_BACKENDS, default='html.parser',
+                        help='Backend HTML : html.parser, lxml ou stream (tokenizer en flux, '
+                             'conserve le balisage octet pour octet)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Nombre de processus pour l\'extraction et la réécriture (0 = nombre de CPU)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Conserve les noms du selector_mapping.json précédent et ne réécrit '
+                             'que les fichiers de sortie concernés par un changement')
+    parser.add_argument('--previous-mapping', type=Path,
+                        help='selector_mapping.json à réutiliser (défaut: celui du répertoire de sortie)')
+    parser.add_argument('--changed-files', type=Path,
+                        help='Écrit la liste des fichiers de sortie modifiés ou supprimés (mode incrémental)')
+    parser.add_argument('--index-file', type=Path,
+                        help='Écrit l\'index inversé des sélecteurs des deux projets (voir la commande query)')
+    parser.add_argument('--copy-assets', action='store_true',
+                        help='Copie les fichiers non réécrits au lieu de les lier (reflink ou lien physique)')
+    parser.add_argument('--splice', action='store_true',
+                        help='Réécrit par éditions ponctuelles : hors des noms renommés, les octets sont '
+                             'conservés, les source maps sont décalées et les éditions listées dans '
+                             + FileReplacer.EDIT_LIST_FILE)
+    parser.add_argument('--watch', action='store_true',
+                        help='Surveille les deux projets et réécrit les sorties à chaque modification')
+    parser.add_argument('--watch-interval', type=float, default=0.05,
+                        help='Intervalle de scrutation du mode --watch en secondes (défaut: 0.05)')
+    parser.add_argument('--cache-dir', type=Path,
+                        help='Répertoire du cache d\'extraction (fichiers inchangés non réanalysés)')
+    parser.add_argument('--cache-max-size', type=int, default=256,
+                        help='Taille maximale du cache d\'extraction en Mo (défaut: 256)')
+    parser.add_argument('--css-stream-threshold', type=int, default=CSS_STREAM_THRESHOLD // (1024 * 1024),
+                        help='Taille en Mo à partir de laquelle un fichier CSS est traité en flux (défaut: 32)')
+    parser.add_argument('--name-seed',
+                        help='Graine des noms générés (défaut: nom du répertoire du projet renommé)')
+    parser.add_argument('--minify-names', action='store_true',
+                        help='Attribue les noms les plus courts aux sélecteurs les plus fréquents')
+    parser.add_argument('--io-threads', type=int, default=IO_THREADS,
+                        help=f'Threads de lecture, copie et écriture en mode mono-processus (défaut: {IO_THREADS})')
+    parser.add_argument('--ignore', action='append', default=[], metavar='MOTIF',
+                        help='Répertoires à ne pas analyser, en plus de '
+                             + ', '.join(FileCollector.IGNORED_DIRECTORIES) + ' (motif fnmatch, répétable)')
+    parser.add_argument('--metrics-json', type=Path,
+                        help='Écrit les métriques par phase et par type de fichier (JSON)')
+    parser.add_argument('--slowest', type=int, default=10,
+                        help='Nombre de fichiers les plus lents dans les métriques (défaut: 10)')
+    parser.add_argument('--profile', type=Path,
+                        help='Profile la résolution avec cProfile et écrit les statistiques (pstats)')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Mesure le pic mémoire et les principales allocations du processus principal')
+
+    args = parser.parse_args(argv)
 
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
     # Vérifier les chemins
     if not args.main_project.exists():
         logger.error(f"Le projet principal {args.main_project} n'existe pas")
@@ -511,10 +3981,84 @@ def main():
         logger.error(f"Le projet démo {args.demo_project} n'existe pas")
         return 1
 
+    cache = None
+    if args.cache_dir:
+        cache = ExtractionCache(args.cache_dir, args.cache_max_size * 1024 * 1024)
+    ignored = list(FileCollector.IGNORED_DIRECTORIES) + args.ignore
+
+    # Mode surveillance : résolution continue jusqu'à interruption
+    if args.watch:
+        unsupported = [
+            option for option, value in (
+                ('--splice', args.splice), ('--previous-mapping', args.previous_mapping),
+                ('--changed-files', args.changed_files), ('--index-file', args.index_file),
+                ('--metrics-json', args.metrics_json), ('--profile', args.profile),
+                ('--tracemalloc', args.tracemalloc), ('--incremental', args.incremental),
+                ('--jobs', args.jobs != 1),
+            ) if value
+        ]
+        if unsupported:
+            parser.error(f"--watch n'est pas compatible avec {', '.join(unsupported)}")
+        session = WatchSession(args.main_project, args.demo_project, args.output, args.html_backend,
+                               cache=cache, ignored=ignored, name_seed=args.name_seed,
+                               minify_names=args.minify_names, link_assets=not args.copy_assets,
+                               css_stream_threshold=args.css_stream_threshold * 1024 * 1024)
+        session.run(args.watch_interval)
+        return 0
+
     # Résoudre les conflits
-    resolver = ConflictResolver()
+
+    resolver = ConflictResolver(html_backend=args.html_backend, jobs=jobs, cache=cache,
+                                link_assets=not args.copy_assets, index_file=args.index_file,
+                                css_stream_threshold=args.css_stream_threshold * 1024 * 1024,
+                                name_seed=args.name_seed, minify_names=args.minify_names,
+                                io_threads=args.io_threads, ignored=ignored, splice=args.splice)
+    resolver.metrics.slowest = args.slowest
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+    if args.tracemalloc:
+        import tracemalloc
+        tracemalloc.start()
     try:
-        result = resolver.resolve_conflicts(args.main_project, args.demo_project, args.output)
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = resolver.resolve_conflicts(
+                args.main_project, args.demo_project, args.output,
+                incremental=args.incremental, previous_mapping_path=args.previous_mapping
+            )
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(args.profile)
+                logger.info(f"Profil écrit dans {args.profile} (python -m pstats {args.profile})")
+            if args.tracemalloc:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                resolver.metrics.memory = {
+                    'current_bytes': current,
+                    'peak_bytes': peak,
+                    'top_allocations': [
+                        {'location': str(stat.traceback), 'bytes': stat.size, 'count': stat.count}
+                        for stat in snapshot.statistics('lineno')[:args.slowest]
+                    ]
+                }
+                logger.info(f"Pic mémoire: {peak / (1024 * 1024):.1f} Mo")
+
+        resolver.metrics.log_summary()
+        if args.metrics_json:
+            resolver.metrics.save(args.metrics_json, status=result['status'],
+                                  html_backend=args.html_backend, jobs=jobs)
+            logger.info(f"Métriques sauvegardées dans {args.metrics_json}")
+
+        if args.changed_files and 'changed_files' in result:
+            args.changed_files.write_text(
+                ''.join(f'{changed_file}\n' for changed_file in result['changed_files']),
+                encoding='utf-8'
+            )
 
         if result['status'] == 'success':
             logger.info("\n" + "="*50)
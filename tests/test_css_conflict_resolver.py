@@ -0,0 +1,166 @@
+"""Tests de non-régression : source maps, lecture en flux et réécriture par éditions"""
+
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from css_conflict_resolver import (  # noqa: E402
+    CSSParser,
+    CSSRewriteEngine,
+    FileReplacer,
+    SelectorMapping,
+    SourceMap,
+    iter_spliced,
+)
+
+MAPPING = {
+    '.card': SelectorMapping('.card', '.uuid-0a1b2c3d', 'class'),
+    '.é-titre': SelectorMapping('.é-titre', '.uuid-1b2c3d4e', 'class'),
+    '#main': SelectorMapping('#main', '#uuid-2c3d4e5f', 'id'),
+    '.x': SelectorMapping('.x', '.uuid-3d4e5f6a', 'class'),
+}
+
+CSS = (
+    '/* en-tête { .card } */\r\n'
+    '@charset "utf-8";\r\n'
+    '.card, .é-titre > .x:hover { content: "{ .card }"; }\r\n'
+    '@media (min-width: 10px) { #main .card { color: red; } }\r\n'
+    '.cardinal, .x\\{ {}\r\n'
+    'a[title="}"] /* } */ .x { margin: 0 }\r\n'
+    '#main{}.x{}\r\n'
+    '.𝒜 .card /**/ { }\n'
+)
+
+
+def mapping_columns(line: str):
+    """Colonnes générées absolues des segments d'une ligne de mappings"""
+    columns = []
+    column = 0
+    for segment in line.split(','):
+        delta, _ = SourceMap._decode_vlq(segment)
+        column += delta
+        columns.append(column)
+    return columns
+
+
+def mapping_line(columns, rest: str = 'AAAA') -> str:
+    """Ligne de mappings dont les segments sont aux colonnes données"""
+    segments = []
+    previous = 0
+    for column in columns:
+        segments.append(SourceMap._encode_vlq(column - previous) + rest)
+        previous = column
+    return ','.join(segments)
+
+
+class TestVLQ:
+    @pytest.mark.parametrize('value, encoded', [(0, 'A'), (1, 'C'), (-1, 'D'), (15, 'e'), (16, 'gB'), (-16, 'hB')])
+    def test_known_values(self, value, encoded):
+        assert SourceMap._encode_vlq(value) == encoded
+        assert SourceMap._decode_vlq(encoded) == (value, '')
+
+    def test_round_trip(self):
+        for value in list(range(-5000, 5000)) + [2 ** 31 - 1, -(2 ** 31 - 1)]:
+            assert SourceMap._decode_vlq(SourceMap._encode_vlq(value) + 'AACA') == (value, 'AACA')
+
+    def test_truncated_segment(self):
+        with pytest.raises(ValueError):
+            SourceMap._decode_vlq('g')
+
+
+class TestSourceMapShift:
+    def test_shift_line(self):
+        line = mapping_line([0, 4, 10, 20], rest='ACAE')
+        # Nom [4, 8) remplacé par un nom plus long de 6 unités
+        shifted = SourceMap._shift_line(line, [(4, 8, 6)])
+        assert mapping_columns(shifted) == [0, 4, 16, 26]
+        assert all(segment.endswith('ACAE') for segment in shifted.split(','))
+
+    def test_segment_inside_replaced_name_is_clamped(self):
+        line = mapping_line([2, 6, 12])
+        # Nom [0, 10) remplacé par un nom de 3 unités
+        assert mapping_columns(SourceMap._shift_line(line, [(0, 10, -7)])) == [2, 3, 5]
+
+    def test_multibyte_columns(self):
+        # é : 2 octets, 1 unité UTF-16 ; 𝒜 : 4 octets, 2 unités UTF-16
+        text = '.é{}.𝒜{}.card{}.x{}\n.card{}\n'
+        raw = text.encode('utf-8')
+        first = [0, 4, 9, 16]
+        data = {'version': 3, 'mappings': mapping_line(first) + ';' + mapping_line([0, 5])}
+
+        start = raw.index(b'.card')
+        edits = [(start, start + len(b'.card'), b'.uuid-0a1b2c3d')]
+        lines = SourceMap.shift(data, raw, edits)['mappings'].split(';')
+
+        # .card commence à la colonne 9 en UTF-16 (11 octets plus loin)
+        assert len(text[:text.index('.card')].encode('utf-16-le')) // 2 == 9
+        assert mapping_columns(lines[0]) == [0, 4, 9, 16 + 9]
+        assert lines[1] == mapping_line([0, 5])
+
+    def test_sections_are_left_unchanged(self):
+        data = {'version': 3, 'sections': []}
+        assert SourceMap.shift(data, b'.card{}', [(0, 5, b'.a')]) is data
+
+
+class TestChunkSizeIndependence:
+    def test_iter_rule_preludes(self):
+        expected = list(CSSParser.iter_rule_preludes(CSS))
+        assert expected
+        assert list(CSSParser.iter_rule_preludes(CSS.encode('utf-8'))) == expected
+        for chunk_size in range(1, len(CSS) + 2):
+            source = io.StringIO(CSS, newline='')
+            assert list(CSSParser.iter_rule_preludes(source, chunk_size)) == expected, chunk_size
+
+    def test_rewrite_stream(self):
+        engine = CSSRewriteEngine(MAPPING)
+        expected = engine.rewrite(CSS)
+        assert expected != CSS
+        for chunk_size in range(1, len(CSS) + 2):
+            destination = io.StringIO(newline='')
+            engine.rewrite_stream(io.StringIO(CSS, newline=''), destination, chunk_size)
+            assert destination.getvalue() == expected, chunk_size
+
+
+class TestSpliceOutput:
+    def rewrite(self, tmp_path: Path, name: str, content: str, file_type: str, **options) -> bytes:
+        source = tmp_path / name
+        source.write_bytes(content.encode('utf-8'))
+        destination = tmp_path / f'{"-".join(options) or "default"}-{name}'
+        FileReplacer(MAPPING, **options).rewrite_file(source, destination, file_type)
+        return destination.read_bytes()
+
+    def test_splice_keeps_bytes_outside_edits(self, tmp_path):
+        source = tmp_path / 'style.css'
+        source.write_bytes(CSS.encode('utf-8'))
+        destination = tmp_path / 'out.css'
+        edits = FileReplacer(MAPPING, splice=True).rewrite_file(source, destination, 'css')
+
+        raw = source.read_bytes()
+        assert edits
+        byte_edits = [(start, end, replacement.encode('utf-8')) for start, end, _, replacement in edits]
+        assert destination.read_bytes() == b''.join(iter_spliced(raw, byte_edits))
+        for start, end, original, _ in edits:
+            assert raw[start:end] == original.encode('utf-8')
+
+    def test_css_stream_matches_splice(self, tmp_path):
+        splice = self.rewrite(tmp_path, 'style.css', CSS, 'css', splice=True)
+        stream = self.rewrite(tmp_path, 'style.css', CSS, 'css', css_stream_threshold=0)
+        text = self.rewrite(tmp_path, 'style.css', CSS, 'css')
+        assert splice == stream == text
+        assert b'\r\n' in splice
+
+    def test_html_stream_matches_splice(self, tmp_path):
+        html = (
+            '<!DOCTYPE html>\r\n<html><head><style>\r\n' + CSS + '</style></head>\r\n'
+            '<body><div  class="card\tautre é-titre" id=main>é 𝒜</div>\r\n'
+            '<p class=\'x\'>.card</p></body></html>\r\n'
+        )
+        splice = self.rewrite(tmp_path, 'index.html', html, 'html', splice=True)
+        stream = self.rewrite(tmp_path, 'index.html', html, 'html', html_backend='stream')
+        assert splice == stream
+        assert b'uuid-0a1b2c3d\tautre uuid-1b2c3d4e' in splice
+        assert b'<p class=\'x\'>.card</p>' not in splice